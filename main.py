@@ -1,75 +1,149 @@
-from py3dbp import Packer, Bin, Item, Painter
+import copy
+
+from py3dbp import Packer, Bin, Item, ItemGroup, Renderer, BinTemplate, PlanCache, planKey
 import streamlit as st
 
-def auto_pack_items(items, bin_limits):
+# Seconds the packing may take before the remaining items are left unfit
+PACK_TIME_BUDGET = 20
+# Item names drawn on a bin plot, the largest items first
+PLOT_MAX_LABELS = 50
+
+@st.cache_resource
+def get_renderer():
+    """ One renderer per server, its image cache survives reruns. """
+    return Renderer()
+
+@st.cache_resource
+def get_plan_cache():
+    """ One plan cache per server, reruns with unchanged inputs skip the packing. """
+    return PlanCache()
+
+def submit_plot(b):
+    """ Start rendering the PNG of a bin and its contents, unchanged bins come from the cache. """
+    return get_renderer().submit(b, 'png', title=b.partno, alpha=0.2, write_num=True, fontsize=10, batched=True, max_labels=PLOT_MAX_LABELS)
+
+def make_item(item, names=None):
+    """ Item of one input row, an ItemGroup of the rows named names when several rows share its dimensions and attributes. """
+    # Define color mapping for item levels
+    color_map = {'優先': 'brown', '普通': 'yellow', '非優先': 'olive'}
+
+    item_name, item_length, item_width, item_height, item_weight, item_loadbear, item_updown, item_level = item
+    if names is not None and len(names) > 1:
+        item_name = '/'.join(names)
+    attributes = dict(partno=item_name, name=item_name, typeof='cube', WHD=(item_length, item_width, item_height), weight=item_weight,
+                      level={'優先': 1, '普通': 2, '非優先': 3}[item_level], loadbear=((item_loadbear == "是") and 300 or 1), updown=((item_updown == "是") and True or False), color=color_map.get(item_level))
+    return ItemGroup(quantity=len(names), **attributes) if names is not None and len(names) > 1 else Item(**attributes)
+
+def warm_start(rows, manifest, bin_limits, key):
+    """
+    Plan of rows edited from the last plan of this session, when neither plan packs rows as a group.
+
+    :return: The edited Packer, stored in the plan cache under key, or None to pack from scratch.
+    """
+    last = st.session_state.get('plan')
+    if last is None or last['bin_limits'] != list(bin_limits):
+        return None
+    if last['grouped'] or any(isinstance(item, ItemGroup) for item in manifest):
+        return None
+    base = get_plan_cache().get(last['key'])
+    if base is None:
+        return None
+    # Cached plans are shared between sessions, the edit goes to a copy
+    packer = copy.deepcopy(base)
+    selected, last_rows = set(rows), set(last['rows'])
+    packer.update(add=[make_item(item) for item in rows if item not in last_rows],
+                  remove=[item[0] for item in last['rows'] if item not in selected])
+    get_plan_cache().put(key, packer)
+    return packer
+
+def pack_with_progress(manifest, options):
+    """ Pack the manifest while a progress bar counts the placed items, the plots of finished bins start early. """
+    packer = Packer()
+    for item in manifest:
+        packer.addItem(item)
+    total = max(sum(getattr(item, 'quantity', 1) for item in manifest), 1)
+    placed = 0
+    progress = st.progress(0.0, text="裝箱中…")
+    for event in packer.iterPack(**options):
+        if event.kind == 'place':
+            placed += getattr(event.item, 'count', 1)
+            progress.progress(min(placed / total, 1.0), text=f"已裝入 {placed}/{total} 件貨物")
+        elif event.kind == 'close':
+            # Render the finished bin while the next ones are packed
+            submit_plot(event.bin)
+    progress.empty()
+    return packer
+
+def auto_pack_items(items, bin_limits, time_budget=PACK_TIME_BUDGET):
     """
     Automatically pack items into bins.
     
     :param items: List of user-inputted items, each with name, length, width, height, and weight.
     :param bin_limits: Tuple containing the bin's dimensions (length, width, height) and weight limit.
+    :param time_budget: Seconds before the search stops and returns the plan found so far, None for no limit.
     :return: None. The function directly visualizes and displays the packing results in the Streamlit app.
     """
     # Unpack bin dimensions and weight limit
     bin_length, bin_width, bin_height, bin_weight_limit = bin_limits
 
-    # Copy items to track those that are not yet packed
-    unfit_items = items[:]
-    bin_count = 0
-
-    # Continue adding bins until all items are packed
-    while unfit_items:
-        packer = Packer()
-
-        # Increment bin count and add new bins
-        bin_count += 1
-        for count in range(1, bin_count+1):
-            new_bin = Bin(f'貨櫃-{count}', (bin_length, bin_width, bin_height), bin_weight_limit, 0, 0)
-            packer.addBin(new_bin)
-
-        # Define color mapping for item levels
-        color_map = {'優先': 'brown', '普通': 'yellow', '非優先': 'olive'}
-
-        # Add items to the packer with conditional attributes
-        for item in items:
-            item_name, item_length, item_width, item_height, item_weight, item_loadbear, item_updown, item_level = item
-            packer.addItem(Item(partno=item_name, name=item_name, typeof='cube', WHD=(item_length, item_width, item_height), weight=item_weight,
-                                level={'優先': 1, '普通': 2, '非優先': 3}[item_level], loadbear=((item_loadbear == "是") and 300 or 1), updown=((item_updown == "是") and True or False), color=color_map.get(item_level)))
-        # Execute packing algorithm with specified parameters
-        packer.pack(
-            bigger_first=True,
-            distribute_items=True,
-            fix_point=True,
-            check_stable=True,
-            support_surface_ratio=0.75,
-            number_of_decimals=0
-        )
-
-        # Update the list of items that are still unfit
-        unfit_items = [(item.name, item.width, item.height, item.depth, item.weight) for item in packer.unfit_items]
-
-        # Arrange items in the order of packing
-        packer.putOrder()
+    # Add items to the packer with conditional attributes, rows differing only by name are packed as one SKU group
+    rows = [tuple(item) for item in items]
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[1:], []).append(row)
+    manifest = [make_item(group[0], [row[0] for row in group]) for group in groups.values()]
+
+    # Open a new bin 貨櫃-1, 貨櫃-2, ... only when the items left over do not fit the bins already packed
+    new_bin = BinTemplate(Bin('貨櫃', (bin_length, bin_width, bin_height), bin_weight_limit, 0, 0))
+
+    # Packing parameters
+    options = dict(
+        bigger_first=True,
+        distribute_items=True,
+        fix_point=True,
+        check_stable=True,
+        support_surface_ratio=0.75,
+        # metres on a centimetre integer grid
+        number_of_decimals=2,
+        numeric='int',
+        bin_factory=new_bin,
+        time_budget=time_budget
+    )
+
+    # Reuse the plan of the same inputs, else edit the last plan of the session, else execute the packing algorithm
+    key = planKey(manifest, [], options)
+    packer = get_plan_cache().get(key)
+    if packer is None:
+        packer = warm_start(rows, manifest, bin_limits, key)
+    if packer is None:
+        packer = pack_with_progress(manifest, options)
+        # A plan cut short by the time budget is not cached, an identical rerun packs again
+        get_plan_cache().put(key, packer)
+    grouped = any(isinstance(item, ItemGroup) for item in manifest)
+    st.session_state['plan'] = dict(bin_limits=list(bin_limits), rows=rows, grouped=grouped, key=key)
+
+    if packer.truncated:
+        st.warning("已達計算時間上限，顯示目前的裝箱結果。", icon="⏱️")
+
+    # Items which do not fit even an empty bin
+    if packer.unfit_items:
+        st.warning("無法裝入的貨物：{}".format(', '.join(item.partno if not isinstance(item, ItemGroup) else f'{item.partno} x{item.unpacked}' for item in packer.unfit_items)), icon="⚠️")
 
     if len(items) > 0:
+        # Render every bin in parallel before displaying them in order
+        plots = [submit_plot(b) for b in packer.bins]
         # Visualize and display results for each bin
-        for b in packer.bins:
+        for b, plot in zip(packer.bins, plots):
             # Calculate the total volume of the bin
             volume = b.width * b.height * b.depth
             volume_t = 0
             
-            # Create a visual representation of the bin and its contents
-            painter = Painter(b)
-            fig = painter.plotBoxAndItems(
-                title=b.partno,
-                alpha=0.2,
-                write_num=True,
-                fontsize=10
-            )
-            st.pyplot(fig)
+            # Display the visual representation of the bin and its contents
+            st.image(plot.result())
 
             # Display details about the packed items in the bin
             st.caption(b.string())
-            for item in b.items:
+            for item in b.iterCartons():
                 st.text(f"貨物：{item.partno}  位置：{item.position}  旋轉：{item.rotation_type}")
                 volume_t += float(item.width) * float(item.height) * float(item.depth)
             
@@ -198,24 +272,16 @@ def main_page():
     selected_items = [item_name.split("-")[0] for item_name in display_items(st.session_state['items'])]
 
     if act:
-        packer = Packer()
         new_bin = Bin(f'盤型', (bin_limits[0], bin_limits[1], bin_limits[2]), bin_limits[3], 0, 0)
-        packer.addBin(new_bin)
+        packer = get_plan_cache().pack([], [new_bin], number_of_decimals=2)
         
         for b in packer.bins:
             # Calculate the total volume of the bin
             volume = b.width * b.height * b.depth
             volume_t = 0
             
-            # Create a visual representation of the bin and its contents
-            painter = Painter(b)
-            fig = painter.plotBoxAndItems(
-                title=b.partno,
-                alpha=0.2,
-                write_num=True,
-                fontsize=10
-            )
-            st.pyplot(fig)
+            # Display the visual representation of the bin and its contents
+            st.image(submit_plot(b).result())
 
     # Execute auto-packing function with selected items
     if len(st.session_state['items']) > 0:
@@ -1 +1,7 @@
-from .main import Packer, Bin, Item, Painter
+from .main import Packer, Bin, Item, ItemGroup, Painter
+from .spatial import GridIndex, LinearIndex
+from .fleet import BinTemplate, FleetPlan, lowerBounds, sizeFleet
+from .portfolio import PortfolioResult, packPortfolio
+from .optimizer import OptimizeResult, optimizeSequence
+from .render import Renderer
+from .plan_cache import PlanCache, planKey
@@ -1,5 +1,17 @@
 from decimal import Decimal
 from .constants import Axis
+from .free_space import EPS
+import multiprocessing
+import numpy as np
+
+
+def poolContext():
+    '''
+    multiprocessing context of the process pools , forkserver where the platform has it , spawn otherwise.
+    fork would copy the locks held by other threads of the parent , e.g. a Streamlit server , and may hang the worker.
+    '''
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
 
 
 def rectIntersect(item1, item2, x, y):
@@ -33,3 +45,27 @@ def set2Decimal(value, number_of_decimals=0):
     number_of_decimals = getLimitNumberOfDecimals(number_of_decimals)
 
     return Decimal(value).quantize(number_of_decimals)
+
+
+def set2Int(value, number_of_decimals=0):
+    ''' value on the integer grid of 10^-number_of_decimals units '''
+    return int(set2Decimal(value, number_of_decimals).scaleb(number_of_decimals))
+
+
+def int2Decimal(value, number_of_decimals=0):
+    ''' inverse of set2Int '''
+    return Decimal(int(value)).scaleb(-number_of_decimals)
+
+
+def overlapMask(lo, hi, a, b):
+    ''' rows whose open interval (lo, hi) overlaps (a, b) by more than EPS '''
+    return (lo < b - EPS) & (a + EPS < hi)
+
+
+def firstGap(starts, ends, length, default):
+    ''' end of the first interval, ordered by end, followed by a gap of at least length '''
+    order = np.argsort(ends, kind='stable')
+    starts = starts[order]
+    ends = ends[order]
+    idx = np.flatnonzero(starts[1:] - ends[:-1] >= length - EPS)
+    return float(ends[idx[0]]) if idx.size else default
@@ -0,0 +1,70 @@
+import math
+
+# quadrants of the bin floor as (x half , y half) , in the order of Packer.gravityCenter
+QUADRANTS = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+
+class LoadTotals:
+    ''' running weight , first moments and quadrant loads of the boxes in a bin , O(1) per add , Bin.reindex starts it over '''
+
+    def __init__(self, WHD):
+        ''' '''
+        self.width = float(WHD[0])
+        self.height = float(WHD[1])
+        self.reset()
+
+
+    def reset(self):
+        ''' '''
+        # in the number type of the weights added
+        self.weight = 0
+        # sum of weight * centre on x , y , z
+        self.moments = [0.0, 0.0, 0.0]
+        # weight over each quadrant , shared by footprint area
+        self.quadrants = [0.0, 0.0, 0.0, 0.0]
+
+
+    def add(self, weight, box):
+        ''' box : [x0,x1,y0,y1,z0,z1] '''
+        self.weight += weight
+        box = [float(v) for v in box]
+        weight = float(weight)
+        for a in range(3):
+            self.moments[a] += weight * (box[2*a] + box[2*a+1]) / 2
+        shares = self.quadrantShares(box)
+        for q in range(4):
+            self.quadrants[q] += weight * shares[q]
+
+
+    def quadrantShares(self, box):
+        ''' part of the footprint of box over each quadrant '''
+        [x0,x1,y0,y1] = box[:4]
+        mx, my = self.width / 2, self.height / 2
+        area = (x1 - x0) * (y1 - y0)
+        if area <= 0:
+            return [1.0 if (x0 >= mx, y0 >= my) == q else 0.0 for q in QUADRANTS]
+        lx = [max(min(x1, mx) - x0, 0), max(x1 - max(x0, mx), 0)]
+        ly = [max(min(y1, my) - y0, 0), max(y1 - max(y0, my), 0)]
+        return [lx[i] * ly[j] / area for i, j in QUADRANTS]
+
+
+    def centre(self, weight=0, box=None):
+        ''' centre of gravity (x,y,z) , with weight at box added if given , None if weightless '''
+        total = float(self.weight) + float(weight)
+        if total <= 0:
+            return None
+        moments = list(self.moments)
+        if box is not None:
+            for a in range(3):
+                moments[a] += float(weight) * (float(box[2*a]) + float(box[2*a+1])) / 2
+        return [m / total for m in moments]
+
+
+    def outside(self, centre, envelope):
+        ''' distance of centre (x,y) outside envelope (x_lo,x_hi,y_lo,y_hi) , fractions of width and height '''
+        if centre is None:
+            return 0.0
+        [x_lo, x_hi, y_lo, y_hi] = envelope
+        dx = max(x_lo * self.width - centre[0], centre[0] - x_hi * self.width, 0)
+        dy = max(y_lo * self.height - centre[1], centre[1] - y_hi * self.height, 0)
+        return math.hypot(dx, dy)
@@ -0,0 +1,232 @@
+''' Headless batch packing, run with `python -m py3dbp.batch jobs.jsonl [-o results.jsonl] [--workers N]` '''
+import argparse
+import collections
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .main import Packer, Bin, Item, ItemGroup
+from .fleet import BinTemplate
+from .auxiliary_methods import poolContext
+
+# Packer.pack options of every job , a job overrides them with its own 'options'
+DEFAULT_OPTIONS = {'bigger_first': True, 'number_of_decimals': 2, 'numeric': 'int'}
+# Item arguments a job record may leave out
+ITEM_DEFAULTS = {'typeof': 'cube', 'level': 1, 'loadbear': 1, 'updown': True, 'color': 'olive'}
+# columns of a CSV job file , one row per item , consecutive rows of the same job form one job
+CSV_COLUMNS = ['job', 'bin', 'bin_width', 'bin_height', 'bin_depth', 'bin_max_weight',
+               'partno', 'width', 'height', 'depth', 'weight', 'level', 'loadbear', 'updown', 'quantity']
+JOB_FORMATS = ['jsonl', 'csv']
+
+
+def readJsonl(lines):
+    ''' job records of a JSONL stream , lines are left unparsed so a bad line only fails its own job '''
+    for line in lines:
+        if line.strip():
+            yield line
+
+
+def readCsv(lines):
+    ''' job records of a CSV stream with CSV_COLUMNS , rows are left unparsed so a bad row only fails its own job '''
+    rows = []
+    for row in csv.DictReader(lines):
+        if rows and row.get('job') != rows[0].get('job'):
+            yield {'id': rows[0].get('job'), 'rows': rows}
+            rows = []
+        rows.append(row)
+    if rows:
+        yield {'id': rows[0].get('job'), 'rows': rows}
+
+
+def csvRecord(rows):
+    ''' job record of the CSV rows of one job , every job packs into copies of its bin '''
+    first = rows[0]
+    record = {
+        'id': first['job'],
+        'bin': {'partno': first['bin'], 'WHD': [first['bin_width'], first['bin_height'], first['bin_depth']],
+                'max_weight': first['bin_max_weight']},
+        'items': [],
+    }
+    for row in rows:
+        item = {'partno': row['partno'], 'WHD': [row['width'], row['height'], row['depth']], 'weight': row['weight']}
+        for key in ['level', 'loadbear', 'quantity']:
+            if row.get(key):
+                item[key] = int(row[key])
+        if row.get('updown'):
+            item['updown'] = row['updown'].strip().lower() in ('1', 'true', 'yes')
+        record['items'].append(item)
+    return record
+
+
+def readJobs(stream, fmt='jsonl'):
+    ''' job records of stream , fmt : name in JOB_FORMATS '''
+    if fmt not in JOB_FORMATS:
+        raise ValueError('fmt must be one of {}'.format(JOB_FORMATS))
+    return readCsv(stream) if fmt == 'csv' else readJsonl(stream)
+
+
+def makeItem(spec):
+    ''' Item of a job item , an ItemGroup when its quantity is above 1 '''
+    spec = dict(ITEM_DEFAULTS, **spec)
+    spec.setdefault('name', spec['partno'])
+    quantity = spec.pop('quantity', 1)
+    if quantity > 1:
+        return ItemGroup(quantity=quantity, **spec)
+    return Item(**spec)
+
+
+def buildJob(record):
+    ''' packer loaded with the bins and items of a job record , and its pack options '''
+    packer = Packer()
+    for spec in record.get('bins', []):
+        packer.addBin(Bin(**spec))
+    for spec in record['items']:
+        packer.addItem(makeItem(spec))
+    options = dict(DEFAULT_OPTIONS, **record.get('options', {}))
+    if 'bin' in record:
+        # as many copies of the bin as the items need
+        options['bin_factory'] = BinTemplate(Bin(**record['bin']))
+    return packer, options
+
+
+def planRecord(packer):
+    ''' JSON-ready plan of a packed packer , cartons of ItemGroups listed one by one '''
+    return {
+        'bins': [{
+            'partno': bin.partno,
+            'weight': float(bin.getTotalWeight()),
+            'utilisation': round(bin.getUtilisation(), 4),
+            'gravity': bin.gravity,
+            'items': [{
+                'partno': carton.partno,
+                'position': [float(v) for v in carton.position],
+                'rotation_type': carton.rotation_type,
+                'dimension': [float(v) for v in carton.getDimension()],
+            } for carton in bin.iterCartons()],
+        } for bin in packer.bins],
+        'unfit': [{
+            'partno': item.partno,
+            'count': item.unpacked if isinstance(item, ItemGroup) else 1,
+        } for item in packer.unfit_items],
+        'truncated': packer.truncated,
+    }
+
+
+def runJob(index, record):
+    ''' result record of one job , any error is caught into the result so it only fails its own job '''
+    start = time.perf_counter()
+    result = {'index': index, 'id': None}
+    try:
+        if isinstance(record, str):
+            record = json.loads(record)
+        elif 'rows' in record:
+            result['id'] = record['id']
+            record = csvRecord(record['rows'])
+        result['id'] = record.get('id', index)
+        packer, options = buildJob(record)
+        packer.pack(**options)
+        result.update(planRecord(packer))
+        result['ok'] = True
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = ''.join(traceback.format_exception_only(type(e), e)).strip()
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def packJobs(records, workers=None, window=None):
+    '''
+    result records of job records packed in a process pool , in the order of records.
+    window : jobs in flight , 2 * workers by default , records are read as results leave so memory stays bounded.
+    workers : processes , None for os.cpu_count() , 0 packs in this process.
+    a crashed worker fails the jobs in flight and the pool is started again.
+    '''
+    if workers == 0:
+        for index, record in enumerate(records):
+            yield runJob(index, record)
+        return
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=poolContext())
+    # (index , future) in submission order
+    pending = collections.deque()
+    try:
+        for index, record in enumerate(records):
+            try:
+                future = executor.submit(runJob, index, record)
+            except BrokenProcessPool:
+                # the jobs in flight fail with the old pool
+                cancelPending(pending)
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=poolContext())
+                future = executor.submit(runJob, index, record)
+            pending.append((index, future))
+            while len(pending) >= window:
+                yield waitResult(*pending.popleft())
+        while pending:
+            yield waitResult(*pending.popleft())
+    finally:
+        cancelPending(pending)
+        executor.shutdown(wait=True)
+
+
+def cancelPending(pending):
+    ''' cancel the (index , future) of pending which have not started , shutdown(cancel_futures=) needs python 3.9 '''
+    for _, future in pending:
+        future.cancel()
+
+
+def waitResult(index, future):
+    ''' result of a submitted job , a failure record if its worker died '''
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        return {'index': index, 'id': None, 'ok': False, 'error': 'BrokenProcessPool: {}'.format(e)}
+
+
+def main(argv=None):
+    ''' '''
+    parser = argparse.ArgumentParser(prog='python -m py3dbp.batch', description=__doc__)
+    parser.add_argument('jobs', help="JSONL or CSV job file , '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL result file , '-' for stdout")
+    parser.add_argument('--format', choices=JOB_FORMATS, help='job file format , by extension by default')
+    parser.add_argument('--workers', type=int, default=None, help='processes , 0 packs in this process')
+    parser.add_argument('--window', type=int, default=None, help='jobs in flight , 2 * workers by default')
+    parser.add_argument('--report', type=int, default=100, help='jobs between throughput reports on stderr')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.jobs.lower().endswith('.csv') else 'jsonl')
+    source = sys.stdin if args.jobs == '-' else open(args.jobs, newline='', encoding='utf-8')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    done = failed = 0
+    try:
+        for result in packJobs(readJobs(source, fmt), args.workers, args.window):
+            sink.write(json.dumps(result, ensure_ascii=False) + '\n')
+            sink.flush()
+            done += 1
+            failed += not result['ok']
+            if args.report and done % args.report == 0:
+                reportThroughput(done, failed, time.perf_counter() - start)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    reportThroughput(done, failed, time.perf_counter() - start)
+    return 1 if failed else 0
+
+
+def reportThroughput(done, failed, seconds):
+    ''' '''
+    rate = done / seconds if seconds > 0 else 0
+    print('{} jobs ({} failed) in {:.2f}s , {:.2f} jobs/s'.format(done, failed, seconds, rate), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
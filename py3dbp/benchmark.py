@@ -0,0 +1,149 @@
+''' Micro benchmarks of the packing core, run with `python -m py3dbp.benchmark [n_items]` '''
+import random
+import sys
+import time
+
+from .main import Packer, Bin, Item, ItemGroup, Painter
+
+# PMC pallet contour in cm
+ULD_WHD = (318, 244, 163)
+ULD_MAX_WEIGHT = 6800
+
+
+def randomItems(n, seed=0):
+    ''' carton manifest with cm dimensions and kg weights '''
+    r = random.Random(seed)
+    items = []
+    for i in range(n):
+        items.append(Item(
+            partno='item-{}'.format(i),
+            name='item-{}'.format(i),
+            typeof='cube',
+            WHD=(r.randint(20, 60), r.randint(20, 60), r.randint(15, 50)),
+            weight=r.randint(1, 30),
+            level=r.choice([1, 2, 3]),
+            loadbear=r.choice([1, 300]),
+            updown=r.choice([True, False]),
+            color='olive'))
+    return items
+
+
+def skuGroups(n, skus=5, seed=0):
+    ''' n cartons of a few SKUs as ItemGroups '''
+    r = random.Random(seed)
+    return [ItemGroup(
+        partno='sku-{}'.format(i),
+        name='sku-{}'.format(i),
+        typeof='cube',
+        WHD=(r.randint(20, 60), r.randint(20, 60), r.randint(15, 50)),
+        weight=r.randint(1, 20),
+        level=1,
+        loadbear=1,
+        updown=r.choice([True, False]),
+        color='olive',
+        quantity=n // skus) for i in range(skus)]
+
+
+def timePack(n, seed=0, bin_kwargs={}, pack_kwargs={}):
+    ''' seconds and packed item count of one pack of n random items '''
+    packer = Packer()
+    packer.addBin(Bin('ULD', ULD_WHD, ULD_MAX_WEIGHT, **bin_kwargs))
+    for item in randomItems(n, seed):
+        packer.addItem(item)
+    start = time.perf_counter()
+    packer.pack(bigger_first=True, fix_point=True, check_stable=True, support_surface_ratio=0.75, **pack_kwargs)
+    return time.perf_counter() - start, len(packer.bins[0].items)
+
+
+def benchSpatialIndex(n=300, seed=0):
+    ''' linear scan against uniform grid collision lookup '''
+    for kind in ['linear', 'grid']:
+        t, placed = timePack(n, seed, bin_kwargs={'spatial_index': kind})
+        print('spatial_index=%-8s items=%d placed=%d time=%.3fs' % (kind, n, placed, t))
+
+
+def benchExtremePoints(n=300, seed=0):
+    ''' corners of every item against the extreme point set as pivots '''
+    for extreme_points in [False, True]:
+        t, placed = timePack(n, seed, pack_kwargs={'extreme_points': extreme_points, 'numeric': 'int'})
+        print('extreme_points=%-5s items=%d placed=%d time=%.3fs' % (extreme_points, n, placed, t))
+
+
+def benchFreeSpace(n=300, seed=0):
+    ''' pivot search against maximal free spaces '''
+    for free_space in [False, True]:
+        t, placed = timePack(n, seed, pack_kwargs={'free_space': free_space, 'numeric': 'int'})
+        print('free_space=%-5s items=%d placed=%d time=%.3fs' % (free_space, n, placed, t))
+
+
+def benchHeightmap(queries=2000, seed=0):
+    ''' support and drop queries on a ULD holding about 2000 cubes of 10 cm : scan of the boxes against a 1 cm heightmap '''
+    r = random.Random(seed)
+    stacks = [(x, y, r.randint(1, 5)) for x in range(0, ULD_WHD[0] - 10, 10) for y in range(0, ULD_WHD[1] - 10, 10)]
+    footprints = [(r.randint(0, 250), r.randint(0, 180), r.randint(20, 60), r.randint(20, 60)) for _ in range(queries)]
+    for cell in [None, 1]:
+        bin = Bin('ULD', ULD_WHD, ULD_MAX_WEIGHT, heightmap_cell=cell)
+        bin.formatNumbers(0, 'int')
+        bin.support_surface_ratio = 0.75
+        for x, y, k in stacks:
+            for z in range(0, 10 * k, 10):
+                item = Item('cube', 'cube', 'cube', (10, 10, 10), 1, 1, 1, False, 'olive')
+                item.formatNumbers(0, 'int')
+                item.position = [x, y, z]
+                bin.commit(item)
+        start = time.perf_counter()
+        for x, y, w, h in footprints:
+            z = bin.checkDepth([x, x + w, y, y + h, 0, 10])
+            bin.isStable(x, y, z, w, h)
+        t = time.perf_counter() - start
+        memory = bin.heightmap.nbytes if bin.heightmap is not None else 0
+        print('heightmap_cell=%-4s boxes=%d queries=%d time=%.3fs memory=%dB' % (cell, len(bin.items), queries, t, memory))
+
+
+def benchPainter(n=300, seed=0, max_labels=30):
+    ''' render time of a packed ULD , patches per face against one Poly3DCollection , labels included '''
+    packer = Packer()
+    packer.addBin(Bin('ULD', ULD_WHD, ULD_MAX_WEIGHT))
+    for item in randomItems(n, seed):
+        packer.addItem(item)
+    packer.pack(bigger_first=True, numeric='int', free_space=True)
+    bin = packer.bins[0]
+    for batched in [False, True]:
+        start = time.perf_counter()
+        plt = Painter(bin).plotBoxAndItems(title=bin.partno, write_num=True, fontsize=6, batched=batched, max_labels=max_labels)
+        fig = plt.gcf()
+        fig.canvas.draw()
+        plt.close(fig)
+        print('batched=%-5s items=%d time=%.3fs' % (batched, len(bin.items), time.perf_counter() - start))
+
+
+def benchEngines(n=300, seed=0):
+    ''' pivot search against layer building , one ULD of mixed cartons and bins opened for SKU groups '''
+    for manifest in ['mixed', 'sku']:
+        for engine in ['pivot', 'layer']:
+            packer = Packer()
+            if manifest == 'mixed':
+                packer.addBin(Bin('ULD', ULD_WHD, ULD_MAX_WEIGHT))
+                items = randomItems(n, seed)
+            else:
+                items = skuGroups(n, seed=seed)
+            for item in items:
+                packer.addItem(item)
+            start = time.perf_counter()
+            packer.pack(
+                bigger_first=True, numeric='int', engine=engine,
+                bin_factory=None if manifest == 'mixed' else lambda count: Bin('ULD-{}'.format(count), ULD_WHD, ULD_MAX_WEIGHT))
+            t = time.perf_counter() - start
+            utilisation = sum(bin.getUtilisation() for bin in packer.bins) / len(packer.bins)
+            print('engine=%-5s manifest=%-5s items=%d bins=%d unfit=%d utilisation=%.3f time=%.3fs' % (
+                engine, manifest, n, len(packer.bins), len(packer.unfit_items), utilisation, t))
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    benchSpatialIndex(n)
+    benchExtremePoints(n)
+    benchFreeSpace(n)
+    benchHeightmap()
+    benchPainter(n)
+    benchEngines(n)
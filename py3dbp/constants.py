@@ -7,6 +7,11 @@ class RotationType:
     RT_WDH = 5
 
     ALL = [RT_WHD, RT_HWD, RT_HDW, RT_DHW, RT_DWH, RT_WDH]
+    # index of width, height, depth on each axis after rotation
+    AXES = {
+        RT_WHD: (0, 1, 2), RT_HWD: (1, 0, 2), RT_HDW: (1, 2, 0),
+        RT_DHW: (2, 1, 0), RT_DWH: (2, 0, 1), RT_WDH: (0, 2, 1),
+    }
     # un upright or un updown
     Notupdown = [RT_WHD,RT_HWD]
  
@@ -0,0 +1,57 @@
+from bisect import insort
+
+from .constants import Axis
+
+# lowest z , then y , then x
+DEFAULT_EP_ORDER = (Axis.DEPTH, Axis.HEIGHT, Axis.WIDTH)
+
+
+class ExtremePointSet:
+    ''' deduplicated corner points where the next item may be put, kept sorted by order '''
+
+    def __init__(self, order=DEFAULT_EP_ORDER):
+        ''' order : axes compared first to last '''
+        self.order = tuple(order)
+        self.points = set()
+        self.sorted = []
+
+
+    def __len__(self):
+        ''' '''
+        return len(self.points)
+
+
+    def __iter__(self):
+        ''' points in order, over a snapshot so the set may change while iterating '''
+        return iter([point for _, point in self.sorted])
+
+
+    def clear(self):
+        ''' '''
+        self.points = set()
+        self.sorted = []
+
+
+    def key(self, point):
+        ''' '''
+        return tuple(float(point[a]) for a in self.order)
+
+
+    def add(self, point):
+        ''' point : (x,y,z) '''
+        point = tuple(point)
+        if point in self.points:
+            return
+        self.points.add(point)
+        insort(self.sorted, (self.key(point), point))
+
+
+    def prune(self, box):
+        ''' drop points occupied by box [x0,x1,y0,y1,z0,z1] '''
+        occupied = [
+            point for point in self.points
+            if all(box[2*a] <= float(point[a]) < box[2*a+1] for a in Axis.ALL)
+        ]
+        if occupied:
+            self.points.difference_update(occupied)
+            self.sorted = [entry for entry in self.sorted if entry[1] in self.points]
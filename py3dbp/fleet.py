@@ -0,0 +1,133 @@
+import copy
+import math
+
+from .main import Packer, START_POSITION
+
+
+class FleetPlan:
+    ''' result of sizeFleet '''
+
+    def __init__(self, packer, bin_count, lower_bound, bounds, tested, feasible=True):
+        ''' '''
+        # packer of the smallest feasible bin count found , of max_bins when none was feasible
+        self.packer = packer
+        self.bin_count = bin_count
+        self.lower_bound = lower_bound
+        # {'volume':,'weight':,'large':}
+        self.bounds = bounds
+        # bin counts which were packed
+        self.tested = tested
+        # False if items which fit an empty bin are still unfit at max_bins
+        self.feasible = feasible
+
+
+    @property
+    def gap(self):
+        ''' bins above the lower bound '''
+        return self.bin_count - self.lower_bound
+
+
+    def string(self):
+        ''' '''
+        return "bins(%s) lower_bound(%s) gap(%s) bounds(%s) tested(%s) feasible(%s)" % (
+            self.bin_count, self.lower_bound, self.gap, self.bounds, self.tested, self.feasible
+        )
+
+
+
+class BinTemplate:
+    ''' picklable bin_factory making empty copies of bin named partno-count '''
+
+    def __init__(self, bin):
+        ''' '''
+        self.bin = copy.deepcopy(bin)
+
+
+    def __call__(self, count):
+        ''' '''
+        bin = copy.deepcopy(self.bin)
+        bin.partno = '{}-{}'.format(self.bin.partno, count)
+        return bin
+
+
+
+def fitsEmpty(item, bin):
+    ''' True if item fits an empty bin in some allowed rotation '''
+    WHD = [float(bin.width), float(bin.height), float(bin.depth)]
+    return float(item.weight) <= float(bin.max_weight) and any(
+        all(float(o[a]) <= WHD[a] for a in range(3)) for o in item.getOrientations()
+    )
+
+
+def isLarge(item, bin):
+    ''' True if item exceeds half of the bin on every axis in every allowed rotation, no two such items share a bin '''
+    WHD = [float(bin.width), float(bin.height), float(bin.depth)]
+    return all(
+        all(float(o[a]) > WHD[a] / 2 for a in range(3)) for o in item.getOrientations()
+    )
+
+
+def lowerBounds(items, bin):
+    ''' cheap lower bounds on the number of bins like bin needed by the items that fit it '''
+    items = [item for item in items if fitsEmpty(item, bin)]
+    volume = sum(float(i.width) * float(i.height) * float(i.depth) for i in items)
+    weight = sum(float(i.weight) for i in items)
+    bin_volume = float(bin.width) * float(bin.height) * float(bin.depth)
+    return {
+        'volume': math.ceil(volume / bin_volume) if bin_volume > 0 else 0,
+        'weight': math.ceil(weight / float(bin.max_weight)) if float(bin.max_weight) > 0 else 0,
+        'large': sum(1 for i in items if isLarge(i, bin)),
+    }
+
+
+def freshItems(items):
+    ''' unplaced copies of items, so every trial starts from the same manifest '''
+    fresh = []
+    for item in items:
+        item = copy.copy(item)
+        item.position = START_POSITION
+        item.rotation_type = 0
+        fresh.append(item)
+    return fresh
+
+
+def sizeFleet(items, bin_factory, max_bins=None, **pack_kwargs):
+    '''
+    smallest number of bins holding items, found by galloping from the lower bound then binary search.
+    bin_factory(count) returns the count-th Bin, pack_kwargs go to Packer.pack.
+    when max_bins is not enough the plan of max_bins is returned with feasible False.
+    '''
+    bounds = lowerBounds(items, bin_factory(1))
+    # items which do not fit even an empty bin are left unfit at any count
+    oversize = set(item.partno for item in items if not fitsEmpty(item, bin_factory(1)))
+    lower = max(list(bounds.values()) + [1 if len(items) > len(oversize) else 0])
+    limit = max(max_bins or len(items), lower)
+    tested = {}
+
+    def attempt(count):
+        packer = Packer()
+        for i in range(1, count + 1):
+            packer.addBin(bin_factory(i))
+        for item in freshItems(items):
+            packer.addItem(item)
+        packer.pack(**pack_kwargs)
+        tested[count] = packer
+        return all(item.partno in oversize for item in packer.unfit_items)
+
+    # gallop : lo is infeasible, hi is the candidate
+    lo, hi = lower - 1, lower
+    while not attempt(hi):
+        lo = hi
+        if hi >= limit:
+            return FleetPlan(tested[hi], hi, lower, bounds, sorted(tested), feasible=False)
+        hi = min(2 * hi, limit)
+
+    # binary search on (lo, hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if attempt(mid):
+            hi = mid
+        else:
+            lo = mid
+
+    return FleetPlan(tested[hi], hi, lower, bounds, sorted(tested))
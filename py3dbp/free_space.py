@@ -0,0 +1,63 @@
+import numpy as np
+
+# tolerance of the float comparisons on space bounds
+EPS = 1e-9
+
+
+class MaximalSpaces:
+    ''' maximal empty boxes of a bin , every point not in a committed box lies in at least one of them '''
+
+    def __init__(self, WHD=(0, 0, 0)):
+        ''' '''
+        self.reset(WHD)
+
+
+    def __len__(self):
+        ''' '''
+        return len(self.boxes)
+
+
+    def __iter__(self):
+        ''' [x0,x1,y0,y1,z0,z1] rows '''
+        return iter(self.boxes.tolist())
+
+
+    def reset(self, WHD):
+        ''' the whole bin is free '''
+        self.boxes = np.array([[0, float(WHD[0]), 0, float(WHD[1]), 0, float(WHD[2])]])
+
+
+    def occupy(self, box):
+        ''' split the spaces overlapping box [x0,x1,y0,y1,z0,z1] around it , then drop the spaces contained in others '''
+        box = np.array([float(v) for v in box])
+        spaces = self.boxes
+        hit = np.ones(len(spaces), dtype=bool)
+        for a in range(3):
+            hit &= (spaces[:,2*a] < box[2*a+1] - EPS) & (box[2*a] + EPS < spaces[:,2*a+1])
+        if not hit.any():
+            return
+        split = spaces[hit]
+        children = []
+        for a in range(3):
+            # the part of each space before , then after the box on axis a
+            low = split[split[:,2*a] < box[2*a] - EPS].copy()
+            low[:,2*a+1] = box[2*a]
+            high = split[split[:,2*a+1] > box[2*a+1] + EPS].copy()
+            high[:,2*a] = box[2*a+1]
+            children += [low, high]
+        kept = spaces[~hit]
+        children = np.concatenate(children)
+        self.boxes = np.concatenate((kept, children[~self.contained(children, kept)]))
+
+
+    def contained(self, children, kept):
+        ''' mask of children inside a kept space or inside another child , of two equal children the first stays '''
+        others = np.concatenate((kept, children))
+        inside = np.ones((len(children), len(others)), dtype=bool)
+        for a in range(3):
+            inside &= others[None,:,2*a] <= children[:,None,2*a] + EPS
+            inside &= children[:,None,2*a+1] <= others[None,:,2*a+1] + EPS
+        # a child does not contain itself , of equal children the first stays
+        equal = np.all(np.abs(children[:,None,:] - children[None,:,:]) <= EPS, axis=2)
+        inside[:, len(kept):] &= ~(equal & np.triu(np.ones(equal.shape, dtype=bool)))
+        return inside.any(axis=1)
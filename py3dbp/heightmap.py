@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+
+from .free_space import EPS
+
+
+class HeightMap:
+    '''
+    top surface of the committed boxes on a grid of cell*cell columns over the bin floor.
+    2.5D : a column counts as full up to its top , queries below the top of a column are left to the caller.
+    a column is flat when the box setting its top covers the whole column , queries touching a column
+    which is not flat return None and are left to the scan of the boxes.
+    '''
+
+    def __init__(self, WHD, cell):
+        ''' cell : column side in bin units '''
+        self.cell = float(cell)
+        self.width = float(WHD[0])
+        self.height = float(WHD[1])
+        shape = (
+            max(1, math.ceil(self.width / self.cell - EPS)),
+            max(1, math.ceil(self.height / self.cell - EPS)),
+        )
+        self.top = np.zeros(shape)
+        # the bin floor covers every column
+        self.flat = np.ones(shape, dtype=bool)
+
+
+    @property
+    def nbytes(self):
+        ''' '''
+        return self.top.nbytes + self.flat.nbytes
+
+
+    def span(self, lo, hi, axis):
+        ''' first and past-the-last column index covered by [lo, hi) on axis '''
+        n = self.top.shape[axis]
+        i0 = min(max(int(math.floor(lo / self.cell + EPS)), 0), n - 1)
+        i1 = min(max(int(math.ceil(hi / self.cell - EPS)), i0 + 1), n)
+        return i0, i1
+
+
+    def footprint(self, x0, x1, y0, y1):
+        ''' slices of the columns under [x0,x1]*[y0,y1] '''
+        i0, i1 = self.span(x0, x1, 0)
+        j0, j1 = self.span(y0, y1, 1)
+        return slice(i0, i1), slice(j0, j1)
+
+
+    def edges(self, s, axis):
+        ''' lower and upper bounds of the columns of slice s on axis , the last column ends at the bin side '''
+        edges = np.arange(s.start, s.stop + 1) * self.cell
+        edges[-1] = min(edges[-1], [self.width, self.height][axis])
+        return edges[:-1], edges[1:]
+
+
+    def add(self, box):
+        ''' raise the columns under box [x0,x1,y0,y1,z0,z1] to its top '''
+        [x0,x1,y0,y1] = [float(v) for v in box[:4]]
+        z1 = float(box[5])
+        sx, sy = self.footprint(x0, x1, y0, y1)
+        lo, hi = self.edges(sx, 0)
+        cx = (x0 <= lo + EPS) & (hi <= x1 + EPS)
+        lo, hi = self.edges(sy, 1)
+        cy = (y0 <= lo + EPS) & (hi <= y1 + EPS)
+        covered = np.outer(cx, cy)
+        top, flat = self.top[sx, sy], self.flat[sx, sy]
+        higher = z1 > top + EPS
+        level = np.abs(z1 - top) <= EPS
+        flat[higher] = covered[higher]
+        flat[level] |= covered[level]
+        np.maximum(top, z1, out=top)
+
+
+    def maxTop(self, x0, x1, y0, y1):
+        ''' highest top under the footprint , None unless every column under it is flat '''
+        sx, sy = self.footprint(x0, x1, y0, y1)
+        if not self.flat[sx, sy].all():
+            return None
+        return float(self.top[sx, sy].max())
+
+
+    def topAt(self, x, y):
+        ''' top of the column holding (x,y) , None unless it is flat '''
+        i, _ = self.span(x, x, 0)
+        j, _ = self.span(y, y, 1)
+        return float(self.top[i, j]) if self.flat[i, j] else None
+
+
+    def supportArea(self, x0, x1, y0, y1, z):
+        ''' area of the footprint over columns whose top is z , exact once maxTop is not None '''
+        sx, sy = self.footprint(x0, x1, y0, y1)
+        lo, hi = self.edges(sx, 0)
+        ox = np.minimum(hi, x1) - np.maximum(lo, x0)
+        lo, hi = self.edges(sy, 1)
+        oy = np.minimum(hi, y1) - np.maximum(lo, y0)
+        on = np.abs(self.top[sx, sy] - z) <= EPS
+        return float(np.sum(np.outer(np.clip(ox, 0, None), np.clip(oy, 0, None)) * on))
+
+
+    def around(self, v, axis):
+        ''' indices of the columns whose closed interval on axis holds v '''
+        n = self.top.shape[axis]
+        k = v / self.cell
+        if abs(k - round(k)) <= EPS:
+            return [i for i in (int(round(k)) - 1, int(round(k))) if 0 <= i < n]
+        return [min(max(int(math.floor(k)), 0), n - 1)]
+
+
+    def cornersOn(self, x0, x1, y0, y1, z):
+        '''
+        True if each vertex of the footprint lies on a flat column with its top at z , False if the columns
+        around a vertex are flat and none is at z , None if it depends on a column which is not flat
+        '''
+        for x in (x0, x1):
+            for y in (y0, y1):
+                cells = [(i, j) for i in self.around(x, 0) for j in self.around(y, 1)]
+                if any(self.flat[c] and abs(self.top[c] - z) <= EPS for c in cells):
+                    continue
+                if all(self.flat[c] for c in cells):
+                    return False
+                return None
+        return True
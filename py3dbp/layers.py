@@ -0,0 +1,193 @@
+''' layer building engine , an alternative to the pivot search of Packer.pack2Bin , see Packer.pack(engine='layer') '''
+import numpy as np
+
+from .auxiliary_methods import overlapMask
+from .free_space import EPS
+from .constants import RotationType
+
+
+class LayerBuilder:
+    '''
+    fills one bin bottom up with horizontal layers. the first item left opens a layer as deep as its flattest
+    orientation , the layer is filled by shelves along height , each shelf by items side by side along width.
+    items go through Bin.putAt , so the weight limit , updown rotations and the stability check are those of putItem.
+    '''
+
+    def __init__(self, bin, check_stable=True, support_surface_ratio=0.75, overdue=None):
+        ''' overdue : function returning True once the search must stop '''
+        self.bin = bin
+        self.overdue = overdue or (lambda: False)
+        bin.check_stable = check_stable
+        bin.support_surface_ratio = support_surface_ratio
+        # usable box inside the corners
+        self.lo = bin.corner
+        self.hi = [bin.width - bin.corner, bin.height - bin.corner, bin.depth]
+        # id(item) : orientations
+        self.shapes = {}
+
+
+    def orientations(self, item):
+        ''' [(rotation type, [w,h,d])] allowed for item '''
+        shapes = self.shapes.get(id(item))
+        if shapes is None:
+            whd = [item.width, item.height, item.depth]
+            shapes = [(rt, [whd[i] for i in RotationType.AXES[rt]]) for rt in self.bin.rotations(item)]
+            self.shapes[id(item)] = shapes
+        return shapes
+
+
+    def isLeft(self, item, placed):
+        ''' True while item , or some carton of a group , is not in the bin '''
+        if hasattr(item, 'unpacked'):
+            return item.unpacked > 0
+        return id(item) not in placed
+
+
+    def pack(self, items, unfitted):
+        ''' place items in their order , appends the ones left over to unfitted '''
+        for _ in self.iterPack(items, unfitted):
+            pass
+
+
+    def iterPack(self, items, unfitted):
+        ''' pack , yielding after each layer and once the items left over are in unfitted '''
+        bin = self.bin
+        if bin.corner != 0 and not bin.items:
+            for i, corner in enumerate(bin.addCorner()):
+                bin.putCorner(i, corner)
+
+        placed = set()
+        z = 0
+        tried = set()
+        while not self.overdue():
+            left = [item for item in items if self.isLeft(item, placed)]
+            opening = self.layerDepth([item for item in left if id(item) not in tried], z)
+            if opening is None:
+                break
+            opener, depth = opening
+            top = self.fillLayer(left, placed, z, depth)
+            if top is None:
+                # nothing stood on this layer , open the next one from another item
+                tried.add(id(opener))
+                continue
+            z = bin.formatPosition(top)
+            tried = set()
+            yield
+
+        unfitted.extend(item for item in items if self.isLeft(item, placed))
+        yield
+
+
+    def layerDepth(self, items, z):
+        ''' (item , depth) of the first item with an orientation fitting above z , flattest first '''
+        for item in items:
+            depths = [
+                d for _, [w,h,d] in self.orientations(item)
+                if w <= self.hi[0] - self.lo and h <= self.hi[1] - self.lo and z + d <= self.hi[2]
+            ]
+            if depths:
+                return item, min(depths)
+        return None
+
+
+    def fillLayer(self, items, placed, z, depth):
+        ''' shelves of the layer [z, z+depth] , top of the highest item placed or None '''
+        top = None
+        y = self.lo
+        # only items with an orientation inside the layer
+        items = [item for item in items if any(d <= depth for _, [w,h,d] in self.orientations(item))]
+        while y < self.hi[1] and not self.overdue():
+            extent, shelf_top = self.fillShelf(items, placed, y, z, depth)
+            if extent is None:
+                # nothing stands at y , go on from the next edge of the layer below
+                y = self.nextEdge(1, y, z, [self.lo, self.hi[0]])
+                if y is None:
+                    break
+                continue
+            top = shelf_top if top is None else max(top, shelf_top)
+            y += extent
+        return top
+
+
+    def fillShelf(self, items, placed, y, z, depth):
+        ''' items along width at y , (shelf extent along height , top) or (None , None) if nothing fits '''
+        x = self.lo
+        extent, top = None, None
+        while x < self.hi[0] and not self.overdue():
+            for item in items:
+                if not self.isLeft(item, placed):
+                    continue
+                put = self.putFirst(item, placed, x, y, z, depth, extent)
+                if put is not None:
+                    break
+            else:
+                # nothing stands at x , go on from the next edge below the shelf
+                x = self.nextEdge(0, x, z, [y, self.hi[1] if extent is None else y + extent])
+                if x is None:
+                    break
+                continue
+            [w,h,item_top] = put
+            x += w
+            extent = h if extent is None else extent
+            top = item_top if top is None else max(top, item_top)
+        return extent, top
+
+
+    def putFirst(self, item, placed, x, y, z, depth, extent):
+        ''' put item , or a row of cartons of a group , at x on the shelf , [w,h,top] or None '''
+        bin = self.bin
+        choice = self.choose(item, x, y, z, depth, extent)
+        if choice is None:
+            return None
+        rt, [w,h,d] = choice
+        unit = item
+        if hasattr(item, 'unpacked'):
+            # a row of stacks of cartons of the group as one block
+            k = self.stack(item, d, depth)
+            room = int((self.hi[0] - x) // w)
+            if item.weight > 0:
+                room = min(room, int((bin.max_weight - bin.getTotalWeight()) // (item.weight * k)))
+            n = min(room, item.unpacked // k)
+            if n < 1:
+                return None
+            unit, rt, w, d = item.row([w,h,d], n, k), RotationType.RT_WHD, w * n, d * k
+        # lowest support under the footprint , a sparse layer below lets items sink into it
+        drop = bin.formatPosition(bin.supportHeight(float(x), float(x + w), float(y), float(y + h), float(z)))
+        if not bin.putAt(unit, [x, y, drop], rt):
+            return None
+        if unit is item:
+            placed.add(id(item))
+        else:
+            item.unpacked -= n * k
+        return [w, h, float(drop + d)]
+
+
+    def stack(self, item, d, depth):
+        ''' cartons of a group stacked in the layer , 1 for an item '''
+        if not hasattr(item, 'unpacked'):
+            return 1
+        return max(1, min(int(depth // d), item.unpacked))
+
+
+    def nextEdge(self, axis, value, z, strip):
+        ''' smallest box edge along axis (0 width , 1 height) after value , among boxes not above z meeting strip on the other axis '''
+        fit = self.bin.fit_items
+        other = 1 - axis
+        rows = fit[overlapMask(fit[:,2*other], fit[:,2*other+1], float(strip[0]), float(strip[1])) & (fit[:,5] <= float(z) + EPS)]
+        edges = np.concatenate((rows[:,2*axis], rows[:,2*axis+1]))
+        edges = edges[edges > float(value) + EPS]
+        return self.bin.formatPosition(edges.min()) if edges.size else None
+
+
+    def choose(self, item, x, y, z, depth, extent):
+        ''' orientation fitting the space left on the shelf , deepest for the layer , then least width left by a row of a group , then closest to the shelf extent '''
+        room = [self.hi[0] - x, (self.hi[1] - y) if extent is None else extent]
+        best = None
+        for rt, [w,h,d] in self.orientations(item):
+            if w > room[0] or h > room[1] or d > depth or z + d > self.hi[2]:
+                continue
+            waste = room[0] % w if hasattr(item, 'unpacked') else 0
+            score = (depth - d * self.stack(item, d, depth), waste, room[1] - h if extent is not None else -h, -w)
+            if best is None or score < best[0]:
+                best = (score, (rt, [w,h,d]))
+        return None if best is None else best[1]
@@ -1,5 +1,12 @@
 from .constants import RotationType, Axis
-from .auxiliary_methods import intersect, set2Decimal
+from .auxiliary_methods import intersect, set2Decimal, set2Int, int2Decimal, overlapMask, firstGap
+from .spatial import makeIndex
+from .placement import PlacementStore, Placement, BlockPlacement
+from .extreme_points import ExtremePointSet, DEFAULT_EP_ORDER
+from .layers import LayerBuilder
+from .free_space import MaximalSpaces, EPS
+from .heightmap import HeightMap
+from .balance import LoadTotals
 import numpy as np
 # required to plot a representation of Bin and contained items 
 from matplotlib.patches import Rectangle,Circle
@@ -8,15 +15,50 @@ import os
 import matplotlib
 myfont = matplotlib.font_manager.FontProperties(fname=f'{os.path.abspath(os.getcwd())}/SimHei.ttf')
 import mpl_toolkits.mplot3d.art3d as art3d
+from matplotlib.colors import to_rgba_array
 from collections import Counter
-import copy
+import time
 DEFAULT_NUMBER_OF_DECIMALS = 0
+# 'decimal' : Decimal arithmetic , 'int' : integer grid of 10^-number_of_decimals units
+DEFAULT_NUMERIC = 'decimal'
+NUMERIC_BACKENDS = ['decimal', 'int']
+# 'pivot' : item corners searched by Packer.pack2Bin , 'layer' : horizontal layers by LayerBuilder
+ENGINES = ['pivot', 'layer']
 START_POSITION = [0, 0, 0]
+# block shapes of an ItemGroup tried before single cartons
+BLOCK_CANDIDATES = 6
+# fraction of the utilisation of the last plan below which Packer.update packs the manifest again
+REPACK_BELOW = 0.9
+# kinds of PackEvent yielded by Packer.iterPack
+PACK_EVENTS = ['open', 'place', 'reject', 'close']
+# Packer.pack memoize modes , 'exact' skips items identical to one which already failed on the same bin state
+MEMO_MODES = [None, 'exact']
 
 
+def maxArea(item):
+    ''' largest face item may lie on , exact '''
+    a = sorted([item.width, item.height, item.depth], reverse=True) if item.updown == True else [item.width, item.height, item.depth]
+    return a[0] * a[1]
+
+
+# first ordering of the items in Packer.pack , exact products as getVolume and getMaxArea round to
+# number_of_decimals in Decimal and would tie items the int backend tells apart
+SORT_KEYS = {
+    'volume': lambda item: item.width * item.height * item.depth,
+    'max_area': maxArea,
+    'longest_side': lambda item: max(item.width, item.height, item.depth),
+    'depth': lambda item: item.depth,
+    'weight': lambda item: item.weight,
+}
+
 
 class Item:
 
+    __slots__ = (
+        'partno', 'name', 'typeof', 'width', 'height', 'depth', 'weight', 'level', 'loadbear',
+        'updown', 'color', 'rotation_type', 'position', 'number_of_decimals', 'numeric'
+    )
+
     def __init__(self, partno,name,typeof, WHD, weight, level, loadbear, updown, color):
         ''' '''
         self.partno = partno
@@ -37,15 +79,31 @@ class Item:
         self.rotation_type = 0
         self.position = START_POSITION
         self.number_of_decimals = DEFAULT_NUMBER_OF_DECIMALS
+        self.numeric = DEFAULT_NUMERIC
 
 
-    def formatNumbers(self, number_of_decimals):
+    def formatNumbers(self, number_of_decimals, numeric=DEFAULT_NUMERIC):
         ''' '''
-        self.width = set2Decimal(self.width, number_of_decimals)
-        self.height = set2Decimal(self.height, number_of_decimals)
-        self.depth = set2Decimal(self.depth, number_of_decimals)
-        self.weight = set2Decimal(self.weight, number_of_decimals)
+        fmt = set2Int if numeric == 'int' else set2Decimal
+        self.width = fmt(self.width, number_of_decimals)
+        self.height = fmt(self.height, number_of_decimals)
+        self.depth = fmt(self.depth, number_of_decimals)
+        self.weight = fmt(self.weight, number_of_decimals)
         self.number_of_decimals = number_of_decimals
+        self.numeric = numeric
+
+
+    def restoreNumbers(self):
+        ''' integer grid back to Decimal user units '''
+        if self.numeric != 'int':
+            return
+        n = self.number_of_decimals
+        self.width = int2Decimal(self.width, n)
+        self.height = int2Decimal(self.height, n)
+        self.depth = int2Decimal(self.depth, n)
+        self.weight = int2Decimal(self.weight, n)
+        self.position = [int2Decimal(i, n) for i in self.position]
+        self.numeric = 'decimal'
 
 
     def string(self):
@@ -58,6 +116,8 @@ class Item:
 
     def getVolume(self):
         ''' '''
+        if self.numeric == 'int':
+            return self.width * self.height * self.depth
         return set2Decimal(self.width * self.height * self.depth, self.number_of_decimals)
 
 
@@ -65,6 +125,8 @@ class Item:
         ''' '''
         a = sorted([self.width,self.height,self.depth],reverse=True) if self.updown == True else [self.width,self.height,self.depth]
     
+        if self.numeric == 'int':
+            return a[0] * a[1]
         return set2Decimal(a[0] * a[1] , self.number_of_decimals)
 
 
@@ -88,11 +150,96 @@ class Item:
         return dimension
 
 
+    def getOrientations(self):
+        ''' [w,h,d] of every rotation type putItem may try '''
+        rotate = RotationType.ALL if self.updown == True else RotationType.Notupdown
+        whd = [self.width, self.height, self.depth]
+        return [[whd[i] for i in RotationType.AXES[rt]] for rt in rotate]
+
+
+    def makePlacement(self):
+        ''' record of the item at its current position and rotation '''
+        return Placement.of(self)
+
+
+
+class ItemGroup(Item):
+    ''' quantity identical cartons of one SKU , packed as n*m*k blocks '''
+
+    __slots__ = ('quantity', 'unpacked')
+
+    def __init__(self, partno,name,typeof, WHD, weight, level, loadbear, updown, color, quantity):
+        ''' weight : of one carton '''
+        Item.__init__(self, partno, name, typeof, WHD, weight, level, loadbear, updown, color)
+        self.quantity = quantity
+        # cartons not placed yet , set by Packer.pack
+        self.unpacked = quantity
+
+
+    def blocks(self, bin, limit=BLOCK_CANDIDATES):
+        ''' the largest n*m*k blocks of unpacked cartons which fit bin dimensions and weight left , then one carton '''
+        WHD = [bin.width, bin.height, bin.depth]
+        room = bin.max_weight - bin.getTotalWeight()
+        most = self.unpacked if self.weight <= 0 else min(self.unpacked, int(room // self.weight))
+        if most < 1:
+            return []
+        shapes = {}
+        for o in self.getOrientations():
+            [n_max, m_max, k_max] = [int(WHD[a] // o[a]) for a in range(3)]
+            for n in range(1, n_max + 1):
+                for m in range(1, m_max + 1):
+                    k = min(k_max, most // (n * m))
+                    if k >= 1 and n * m * k > 1:
+                        shapes.setdefault(tuple(o[a] * c for a, c in enumerate([n, m, k])), (n * m * k, o, [n, m, k]))
+        ranked = sorted(shapes.values(), key=lambda shape: shape[0], reverse=True)[:limit]
+        blocks = [ItemBlock(self, o, counts) for _, o, counts in ranked]
+        return blocks + [ItemBlock(self, [self.width, self.height, self.depth], [1, 1, 1])]
+
+
+    def row(self, carton, n, k=1):
+        ''' n stacks of k cartons of dimensions carton side by side along width '''
+        return ItemBlock(self, carton, [n, 1, k])
+
+
+
+class ItemBlock(Item):
+    ''' n*m*k cartons of an ItemGroup handled as one item by putItem '''
+
+    __slots__ = ('group', 'counts', 'carton')
+
+    def __init__(self, group, carton, counts):
+        ''' carton : dimensions of one carton along the block axes '''
+        count = counts[0] * counts[1] * counts[2]
+        Item.__init__(
+            self, group.partno, group.name, group.typeof, [carton[a] * counts[a] for a in range(3)],
+            group.weight * count, group.level, group.loadbear, group.updown, group.color)
+        self.number_of_decimals = group.number_of_decimals
+        self.numeric = group.numeric
+        self.group = group
+        self.counts = tuple(counts)
+        self.carton = tuple(carton)
+
+
+    def makePlacement(self):
+        ''' block record referring to the group '''
+        axes = RotationType.AXES[self.rotation_type]
+        return BlockPlacement(
+            self.group, self.position, self.rotation_type, self.getDimension(),
+            [self.counts[i] for i in axes], [self.carton[i] for i in axes])
+
+
 
 class Bin:
 
-    def __init__(self, partno, WHD, max_weight,corner=0,put_type=1):
-        ''' '''
+    def __init__(self, partno, WHD, max_weight,corner=0,put_type=1,spatial_index='grid',ep_order=DEFAULT_EP_ORDER,heightmap_cell=None,cg_envelope=None):
+        ''' 
+        spatial_index : 'grid', 'linear' or an object with clear/insert/query
+        ep_order : axes ordering the extreme points, lowest z then y then x by default
+        heightmap_cell : column side , in the units of WHD , of a HeightMap answering drop height and support
+        queries , None scans the committed boxes
+        cg_envelope : (x_lo,x_hi,y_lo,y_hi) fractions of width and height , placements moving the centre of
+        gravity further outside it are rejected , None for no limit
+        '''
         self.partno = partno
         self.width = WHD[0]
         self.height = WHD[1]
@@ -100,24 +247,77 @@ class Bin:
         self.max_weight = max_weight
         self.corner = corner
         self.items = []
-        self.fit_items = np.array([[0,WHD[0],0,WHD[1],0,0]])
+        # committed boxes, the first row is the bin floor
+        self.placements = PlacementStore()
+        self.placements.append(self.floorBox())
+        # candidate positions of the next item
+        self.extreme_points = ExtremePointSet(ep_order)
+        self.extreme_points.add(START_POSITION)
+        # maximal empty boxes
+        self.free_spaces = MaximalSpaces(WHD)
+        self.heightmap_cell = heightmap_cell
+        self.heightmap = None if heightmap_cell is None else HeightMap(WHD, heightmap_cell)
+        # running weight , moments and quadrant loads
+        self.load = LoadTotals(WHD)
+        self.cg_envelope = cg_envelope
         self.unfitted_items = []
         self.number_of_decimals = DEFAULT_NUMBER_OF_DECIMALS
+        self.numeric = DEFAULT_NUMERIC
         self.fix_point = False
         self.check_stable = False
         self.support_surface_ratio = 0
+        # rotation types tried first to last , None keeps RotationType order
+        self.rotation_order = None
         self.put_type = put_type
+        # collision lookup of committed items
+        self.spatial_index = spatial_index
+        self.index = makeIndex(spatial_index, WHD)
         # used to put gravity distribution
         self.gravity = []
+        # bumped on every change of the items in bin
+        self.version = 0
+        # shapes known not to fit the bin at unfit_state
+        self.unfit_state = None
+        self.unfit_exact = set()
+        # search counters
+        self.stats = Counter()
 
 
-    def formatNumbers(self, number_of_decimals):
+    def formatNumbers(self, number_of_decimals, numeric=DEFAULT_NUMERIC):
         ''' '''
-        self.width = set2Decimal(self.width, number_of_decimals)
-        self.height = set2Decimal(self.height, number_of_decimals)
-        self.depth = set2Decimal(self.depth, number_of_decimals)
-        self.max_weight = set2Decimal(self.max_weight, number_of_decimals)
+        fmt = set2Int if numeric == 'int' else set2Decimal
+        self.width = fmt(self.width, number_of_decimals)
+        self.height = fmt(self.height, number_of_decimals)
+        self.depth = fmt(self.depth, number_of_decimals)
+        self.max_weight = fmt(self.max_weight, number_of_decimals)
+        self.corner = fmt(self.corner, number_of_decimals)
         self.number_of_decimals = number_of_decimals
+        self.numeric = numeric
+        self.reindex()
+
+
+    def restoreNumbers(self):
+        ''' integer grid back to Decimal user units, for bin and the items in it '''
+        if self.numeric != 'int':
+            return
+        n = self.number_of_decimals
+        self.width = int2Decimal(self.width, n)
+        self.height = int2Decimal(self.height, n)
+        self.depth = int2Decimal(self.depth, n)
+        self.max_weight = int2Decimal(self.max_weight, n)
+        self.corner = int2Decimal(self.corner, n)
+        for placement in self.items:
+            placement.item.restoreNumbers()
+        self.items = [placement.toDecimal(n) for placement in self.items]
+        self.numeric = 'decimal'
+        self.reindex()
+
+
+    def formatPosition(self, value):
+        ''' snapped coordinate in the number type of the bin '''
+        if self.numeric == 'int':
+            return int(round(value))
+        return set2Decimal(value, self.number_of_decimals)
 
 
     def string(self):
@@ -128,21 +328,163 @@ class Bin:
         )
 
 
+    def floorBox(self):
+        ''' zero-thick box of the bin floor '''
+        return [0, float(self.width), 0, float(self.height), 0, 0]
+
+
+    @property
+    def fit_items(self):
+        ''' (n,6) view of committed [x0,x1,y0,y1,z0,z1] boxes '''
+        return self.placements.boxes
+
+
     def getVolume(self):
         ''' '''
+        if self.numeric == 'int':
+            return self.width * self.height * self.depth
         return set2Decimal(
             self.width * self.height * self.depth, self.number_of_decimals
         )
 
 
+    def getUtilisation(self):
+        ''' packed volume over bin volume '''
+        volume = float(self.getVolume())
+        used = sum(float(w) * float(h) * float(d) for [w,h,d] in (i.getDimension() for i in self.items))
+        return used / volume if volume else 0
+
+
     def getTotalWeight(self):
+        ''' running total , O(1) '''
+        if self.numeric == 'int':
+            return self.load.weight
+        return set2Decimal(self.load.weight, self.number_of_decimals)
+
+
+    def getCentreOfGravity(self):
+        ''' (x,y,z) of the load , None for an empty bin '''
+        return self.load.centre()
+
+
+    def isBalanced(self, weight, box):
+        ''' False if weight at box moves the centre of gravity further outside cg_envelope , O(1) '''
+        centre = self.load.centre()
+        if self.cg_envelope is None or centre is None:
+            return True
+        before = self.load.outside(centre, self.cg_envelope)
+        return self.load.outside(self.load.centre(weight, box), self.cg_envelope) <= before + EPS
+
+
+    def reindex(self):
+        ''' rebuild placements, spatial index and extreme points from the items in bin '''
+        items = self.items
+        self.items = []
+        self.placements.reset()
+        self.placements.append(self.floorBox())
+        self.index = makeIndex(self.spatial_index, [self.width, self.height, self.depth])
+        self.extreme_points.clear()
+        self.extreme_points.add(START_POSITION)
+        self.free_spaces.reset([self.width, self.height, self.depth])
+        self.load = LoadTotals([self.width, self.height, self.depth])
+        if self.heightmap_cell is not None:
+            cell = set2Int(self.heightmap_cell, self.number_of_decimals) if self.numeric == 'int' else self.heightmap_cell
+            self.heightmap = HeightMap([self.width, self.height, self.depth], cell)
+        self.version += 1
+        for item in items:
+            self.commit(item)
+
+
+    def commit(self, item):
+        ''' record item , or a Placement , at its position and rotation '''
+        box = self.itemBox(item)
+        idx = len(self.items)
+        self.placements.append(box, idx, item.rotation_type)
+        self.index.insert(idx, box)
+        self.items.append(item if isinstance(item, Placement) else item.makePlacement())
+        self.load.add(self.items[-1].weight, box)
+        self.updateExtremePoints(item)
+        self.free_spaces.occupy(box)
+        if self.heightmap is not None:
+            self.heightmap.add(box)
+        self.version += 1
+
+
+    def iterCartons(self):
+        ''' placements with ItemGroup blocks expanded to single cartons , lazily '''
+        for placement in self.items:
+            if isinstance(placement, BlockPlacement):
+                yield from placement.expand()
+            else:
+                yield placement
+
+
+    def shapeKey(self, item):
+        ''' what putItem depends on of item , dimensions , weight , level , updown and loadbear '''
+        return (item.typeof, item.width, item.height, item.depth, item.weight, item.level, item.updown, item.loadbear)
+
+
+    def syncUnfit(self, context):
+        ''' forget the unfit shapes once the bin or the search options changed '''
+        state = (self.version, context)
+        if self.unfit_state != state:
+            self.unfit_state = state
+            self.unfit_exact = set()
+
+
+    def isKnownUnfit(self, item, context):
+        ''' True if an identical item already failed against the current bin and context '''
+        self.syncUnfit(context)
+        known = self.shapeKey(item) in self.unfit_exact
+        self.stats['memo_hits' if known else 'memo_misses'] += 1
+        return known
+
+
+    def rememberUnfit(self, item, context):
         ''' '''
-        total_weight = 0
+        self.syncUnfit(context)
+        self.unfit_exact.add(self.shapeKey(item))
 
-        for item in self.items:
-            total_weight += item.weight
 
-        return set2Decimal(total_weight, self.number_of_decimals)
+    def updateExtremePoints(self, item):
+        ''' add the three corner points of a committed item dropped on their support, drop occupied points '''
+        [w,h,d] = item.getDimension()
+        [x,y,z] = item.position
+        self.extreme_points.prune([float(i) for i in self.itemBox(item)])
+        for point in ([x+w, y, z], [x, y+h, z], [x, y, z+d]):
+            if point[0] >= self.width or point[1] >= self.height or point[2] >= self.depth:
+                continue
+            point[2] = self.formatPosition(self.dropHeight(float(point[0]), float(point[1]), float(point[2])))
+            if not self.isOccupied([float(i) for i in point]):
+                self.extreme_points.add(point)
+
+
+    def dropHeight(self, x, y, z):
+        ''' highest top surface under (x,y) not above z '''
+        if self.heightmap is not None:
+            top = self.heightmap.topAt(x, y)
+            if top is not None and top <= z:
+                return top
+        fit = self.fit_items
+        under = (fit[:,0] <= x) & (x < fit[:,1]) & (fit[:,2] <= y) & (y < fit[:,3]) & (fit[:,5] <= z)
+        return float(fit[under, 5].max()) if under.any() else 0.0
+
+
+    def isOccupied(self, point):
+        ''' True if point lies inside a committed box '''
+        fit = self.fit_items
+        return bool(np.any(
+            (fit[:,0] <= point[0]) & (point[0] < fit[:,1]) &
+            (fit[:,2] <= point[1]) & (point[1] < fit[:,3]) &
+            (fit[:,4] <= point[2]) & (point[2] < fit[:,5])
+        ))
+
+
+    def itemBox(self, item):
+        ''' [x0,x1,y0,y1,z0,z1] of item at its position '''
+        [w,h,d] = item.getDimension()
+        [x,y,z] = item.position
+        return [x, x+w, y, y+h, z, z+d]
 
 
     def putItem(self, item, pivot,axis=None):
@@ -150,8 +492,7 @@ class Bin:
         fit = False
         valid_item_position = item.position
         item.position = pivot
-        rotate = RotationType.ALL if item.updown == True else RotationType.Notupdown
-        for i in range(0, len(rotate)):
+        for i in self.rotations(item):
             item.rotation_type = i
             dimension = item.getDimension()
             # rotatate
@@ -164,8 +505,8 @@ class Bin:
 
             fit = True
 
-            for current_item_in_bin in self.items:
-                if intersect(current_item_in_bin, item):
+            for idx in self.index.query(self.itemBox(item)):
+                if intersect(self.items[idx], item):
                     fit = False
                     break
 
@@ -193,38 +534,19 @@ class Bin:
                     # rule : 
                     # 1. Define a support ratio, if the ratio below the support surface does not exceed this ratio, compare the second rule.
                     # 2. If there is no support under any vertices of the bottom of the item, then fit = False.
-                    if self.check_stable == True :
-                        # Cal the surface area of ​​item.
-                        item_area_lower = int(dimension[0] * dimension[1])
-                        # Cal the surface area of ​​the underlying support.
-                        support_area_upper = 0
-                        for i in self.fit_items:
-                            # Verify that the lower support surface area is greater than the upper support surface area * support_surface_ratio.
-                            if z == i[5]  :
-                                area = len(set([ j for j in range(int(x),int(x+int(w)))]) & set([ j for j in range(int(i[0]),int(i[1]))])) * \
-                                len(set([ j for j in range(int(y),int(y+int(h)))]) & set([ j for j in range(int(i[2]),int(i[3]))]))
-                                support_area_upper += area
-
-                        # If not , get four vertices of the bottom of the item.
-                        if support_area_upper / item_area_lower < self.support_surface_ratio :
-                            four_vertices = [[x,y],[x+float(w),y],[x,y+float(h)],[x+float(w),y+float(h)]]
-                            #  If any vertices is not supported, fit = False.
-                            c = [False,False,False,False]
-                            for i in self.fit_items:
-                                if z == i[5] :
-                                    for jdx,j in enumerate(four_vertices) :
-                                        if (i[0] <= j[0] <= i[1]) and (i[2] <= j[1] <= i[3]) :
-                                            c[jdx] = True
-                            if False in c :
-                                item.position = valid_item_position
-                                fit = False
-                                return fit
+                    if self.check_stable == True and not self.isStable(x, y, z, float(w), float(h)):
+                        item.position = valid_item_position
+                        fit = False
+                        return fit
                         
-                    self.fit_items = np.append(self.fit_items,np.array([[x,x+float(w),y,y+float(h),z,z+float(d)]]),axis=0)
-                    item.position = [set2Decimal(x),set2Decimal(y),set2Decimal(z)]
+                    item.position = [self.formatPosition(x),self.formatPosition(y),self.formatPosition(z)]
 
                 if fit :
-                    self.items.append(copy.deepcopy(item))
+                    if not self.isBalanced(item.weight, self.itemBox(item)):
+                        item.position = valid_item_position
+                        fit = False
+                        return fit
+                    self.commit(item)
 
             else :
                 item.position = valid_item_position
@@ -237,77 +559,146 @@ class Bin:
         return fit
 
 
+    def rotations(self, item):
+        ''' rotation types allowed for item by updown , in rotation_order '''
+        rotate = RotationType.ALL if item.updown == True else RotationType.Notupdown
+        if self.rotation_order is not None:
+            rotate = [i for i in self.rotation_order if i in rotate]
+        return rotate
+
+
+    def supportHeight(self, x0, x1, y0, y1, z):
+        ''' highest top surface not above z under the footprint [x0,x1]*[y0,y1] '''
+        if self.heightmap is not None:
+            top = self.heightmap.maxTop(x0, x1, y0, y1)
+            if top is not None and top <= z + EPS:
+                return top
+        fit = self.fit_items
+        under = overlapMask(fit[:,0], fit[:,1], x0, x1) & overlapMask(fit[:,2], fit[:,3], y0, y1) & (fit[:,5] <= z + EPS)
+        return float(fit[under, 5].max()) if under.any() else 0.0
+
+
+    def putAt(self, item, position, rotation_type):
+        ''' put item at position in rotation_type without searching , True if it fits , is light and stable enough '''
+        [w,h,d] = [item.width, item.height, item.depth]
+        [w,h,d] = [[w,h,d][i] for i in RotationType.AXES[rotation_type]]
+        [x,y,z] = position
+        if self.width < x + w or self.height < y + h or self.depth < z + d:
+            return False
+        if self.getTotalWeight() + item.weight > self.max_weight:
+            return False
+        if self.check_stable == True and not self.isStable(float(x), float(y), float(z), float(w), float(h)):
+            return False
+        if not self.isBalanced(item.weight, [x, x+w, y, y+h, z, z+d]):
+            return False
+        valid_item_position, valid_rotation_type = item.position, item.rotation_type
+        item.position, item.rotation_type = list(position), rotation_type
+        for idx in self.index.query(self.itemBox(item)):
+            if intersect(self.items[idx], item):
+                item.position, item.rotation_type = valid_item_position, valid_rotation_type
+                return False
+        self.commit(item)
+        return True
+
+
+    def putFree(self, item, overdue=None):
+        '''
+        put item at the corner of the lowest , then tightest , maximal free space holding one of its orientations.
+        spaces are empty , so neither the collision scan nor the snapping of putItem is needed.
+        overdue : function returning True once the search must stop
+        '''
+        if self.getTotalWeight() + item.weight > self.max_weight:
+            return False
+        spaces = self.free_spaces.boxes
+        size = spaces[:,1::2] - spaces[:,0::2]
+        whd = [item.width, item.height, item.depth]
+        candidates = []
+        for order, rt in enumerate(self.rotations(item)):
+            dimension = np.array([float(whd[i]) for i in RotationType.AXES[rt]])
+            fits = np.flatnonzero(np.all(size >= dimension - EPS, axis=1))
+            # rounded to EPS , ties of the int grid stay ties in the float sums of Decimal sides
+            residual = np.round(np.prod(size[fits], axis=1) - np.prod(dimension), 9)
+            candidates += [(spaces[i,4], spaces[i,2], spaces[i,0], r, order, rt, dimension) for i, r in zip(fits, residual)]
+        candidates.sort(key=lambda c: c[:5])
+        for z, y, x, _, _, rt, [w,h,d] in candidates:
+            if overdue is not None and overdue():
+                return False
+            if self.check_stable == True and not self.isStable(x, y, z, w, h):
+                continue
+            if not self.isBalanced(item.weight, [x, x+w, y, y+h, z, z+d]):
+                continue
+            item.rotation_type = rt
+            item.position = [self.formatPosition(x),self.formatPosition(y),self.formatPosition(z)]
+            self.commit(item)
+            return True
+        return False
+
+
+    def isStable(self, x, y, z, w, h):
+        ''' support ratio and four vertices rule for a w*h bottom at (x,y,z) '''
+        top = None if self.heightmap is None else self.heightmap.maxTop(x, x + w, y, y + h)
+        if top is not None and top <= z + EPS:
+            # flat columns , nothing under the footprint reaches above z , the columns at z are the support
+            if self.heightmap.supportArea(x, x + w, y, y + h, z) >= self.support_surface_ratio * w * h - EPS:
+                return True
+            on = self.heightmap.cornersOn(x, x + w, y, y + h, z)
+            if on is not None:
+                return on
+        fit = self.fit_items
+        # rows whose top surface is the bottom of the item
+        below = fit[np.abs(fit[:,5] - z) <= EPS]
+        # Cal the surface area of the underlying support.
+        dx = np.minimum(below[:,1], x + w) - np.maximum(below[:,0], x)
+        dy = np.minimum(below[:,3], y + h) - np.maximum(below[:,2], y)
+        support_area = np.sum(np.clip(dx, 0, None) * np.clip(dy, 0, None))
+        # within EPS , the float sums of Decimal sides miss exact ties the int grid keeps
+        if support_area >= self.support_surface_ratio * w * h - EPS:
+            return True
+        # If not , every vertex of the bottom of the item must lie on a support.
+        vx = np.array([x, x + w, x, x + w])
+        vy = np.array([y, y, y + h, y + h])
+        on = (below[:,0,None] <= vx + EPS) & (vx <= below[:,1,None] + EPS) & \
+            (below[:,2,None] <= vy + EPS) & (vy <= below[:,3,None] + EPS)
+        return bool(on.any(axis=0).all())
+
+
+    def snapAxis(self, axis, unfix_point):
+        ''' lowest gap on axis which can hold the item, among fit_items overlapping it on the two other axes '''
+        fit = self.fit_items
+        a, b = [i for i in Axis.ALL if i != axis]
+        mask = overlapMask(fit[:,2*a], fit[:,2*a+1], unfix_point[2*a], unfix_point[2*a+1]) & \
+            overlapMask(fit[:,2*b], fit[:,2*b+1], unfix_point[2*b], unfix_point[2*b+1])
+        limit = float([self.width, self.height, self.depth][axis])
+        starts = np.concatenate(([0, limit], fit[mask, 2*axis]))
+        ends = np.concatenate(([0, limit], fit[mask, 2*axis+1]))
+        length = unfix_point[2*axis+1] - unfix_point[2*axis]
+        return firstGap(starts, ends, length, unfix_point[2*axis])
+
+
     def checkDepth(self,unfix_point):
-        ''' fix item position z '''
-        z_ = [[0,0],[float(self.depth),float(self.depth)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on x set and y set.
-            if len(x_bottom & x_top) != 0 and len(y_bottom & y_top) != 0 :
-                z_.append([float(j[4]),float(j[5])])
-        top_depth = unfix_point[5] - unfix_point[4]
-        # find diff set on z_.
-        z_ = sorted(z_, key = lambda z_ : z_[1])
-        for j in range(len(z_)-1):
-            if z_[j+1][0] -z_[j][1] >= top_depth:
-                return z_[j][1]
-        return unfix_point[4]
+        ''' fix item position z , on the heightmap the top under the item when its columns are flat '''
+        top = None if self.heightmap is None else self.heightmap.maxTop(*unfix_point[:4])
+        if top is not None:
+            if top + unfix_point[5] - unfix_point[4] <= float(self.depth):
+                return top
+            return unfix_point[4]
+        return self.snapAxis(Axis.DEPTH, unfix_point)
 
 
     def checkWidth(self,unfix_point):
         ''' fix item position x ''' 
-        x_ = [[0,0],[float(self.width),float(self.width)]]
-        for j in self.fit_items:
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on z set and y set.
-            if len(z_bottom & z_top) != 0 and len(y_bottom & y_top) != 0 :
-                x_.append([float(j[0]),float(j[1])])
-        top_width = unfix_point[1] - unfix_point[0]
-        # find diff set on x_bottom and x_top.
-        x_ = sorted(x_,key = lambda x_ : x_[1])
-        for j in range(len(x_)-1):
-            if x_[j+1][0] -x_[j][1] >= top_width:
-                return x_[j][1]
-        return unfix_point[0]
+        return self.snapAxis(Axis.WIDTH, unfix_point)
     
 
     def checkHeight(self,unfix_point):
         '''fix item position y '''
-        y_ = [[0,0],[float(self.height),float(self.height)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # find intersection on x set and z set.
-            if len(x_bottom & x_top) != 0 and len(z_bottom & z_top) != 0 :
-                y_.append([float(j[2]),float(j[3])])
-        top_height = unfix_point[3] - unfix_point[2]
-        # find diff set on y_bottom and y_top.
-        y_ = sorted(y_,key = lambda y_ : y_[1])
-        for j in range(len(y_)-1):
-            if y_[j+1][0] -y_[j][1] >= top_height:
-                return y_[j][1]
-
-        return unfix_point[2]
+        return self.snapAxis(Axis.HEIGHT, unfix_point)
 
 
     def addCorner(self):
         '''add container coner '''
         if self.corner != 0 :
-            corner = set2Decimal(self.corner)
+            corner = self.corner
             corner_list = []
             for i in range(8):
                 a = Item(
@@ -320,6 +711,8 @@ class Bin:
                     loadbear=0, 
                     updown=True, 
                     color='#000000')
+                a.number_of_decimals = self.number_of_decimals
+                a.numeric = self.numeric
 
                 corner_list.append(a)
             return corner_list
@@ -328,26 +721,70 @@ class Bin:
     def putCorner(self,info,item):
         '''put coner in bin '''
         fit = False
-        x = set2Decimal(self.width - self.corner)
-        y = set2Decimal(self.height - self.corner)
-        z = set2Decimal(self.depth - self.corner)
+        x = self.formatPosition(self.width - self.corner)
+        y = self.formatPosition(self.height - self.corner)
+        z = self.formatPosition(self.depth - self.corner)
         pos = [[0,0,0],[0,0,z],[0,y,z],[0,y,0],[x,y,0],[x,0,0],[x,0,z],[x,y,z]]
         item.position = pos[info]
-        self.items.append(item)
-
-        corner = [float(item.position[0]),float(item.position[0])+float(self.corner),float(item.position[1]),float(item.position[1])+float(self.corner),float(item.position[2]),float(item.position[2])+float(self.corner)]
-
-        self.fit_items = np.append(self.fit_items,np.array([corner]),axis=0)
+        self.commit(item)
         return
 
 
     def clearBin(self):
         ''' clear item which in bin '''
         self.items = []
-        self.fit_items = np.array([[0,self.width,0,self.height,0,0]])
+        self.reindex()
         return
 
 
+    def orderItems(self, key):
+        ''' sort items by key , the placements and the collision index follow , the free space does not depend on order '''
+        self.items.sort(key=key)
+        self.placements.reset()
+        self.placements.append(self.floorBox())
+        self.index = makeIndex(self.spatial_index, [self.width, self.height, self.depth])
+        for idx, item in enumerate(self.items):
+            box = self.itemBox(item)
+            self.placements.append(box, idx, item.rotation_type)
+            self.index.insert(idx, box)
+
+
+    def removeItems(self, placements):
+        '''
+        take placements out of bin with every box resting on them , directly or through others ,
+        returns the placements taken out in bin order , corners stay
+        '''
+        if not placements:
+            return []
+        boxes = self.fit_items[1:]
+        fixed = np.array([p.name == 'corner' for p in self.items])
+        lifted = np.zeros(len(self.items), dtype=bool)
+        todo = [i for i, p in enumerate(self.items) if any(p is q for q in placements)]
+        lifted[todo] = True
+        while todo:
+            [x0,x1,y0,y1,_,z1] = boxes[todo.pop()]
+            on = ~lifted & ~fixed & (np.abs(boxes[:,4] - z1) <= EPS) & \
+                overlapMask(boxes[:,0], boxes[:,1], x0, x1) & overlapMask(boxes[:,2], boxes[:,3], y0, y1)
+            lifted |= on
+            todo += np.flatnonzero(on).tolist()
+        removed = [p for p, out in zip(self.items, lifted) if out]
+        self.items = [p for p, out in zip(self.items, lifted) if not out]
+        self.reindex()
+        return removed
+
+
+class PackEvent:
+    ''' one step of Packer.iterPack , item is the Placement of 'place' and the item of 'reject' '''
+
+    __slots__ = ('kind', 'bin', 'item')
+
+    def __init__(self, kind, bin, item=None):
+        ''' kind : name in PACK_EVENTS '''
+        self.kind = kind
+        self.bin = bin
+        self.item = item
+
+
 class Packer:
 
     def __init__(self):
@@ -357,6 +794,19 @@ class Packer:
         self.unfit_items = []
         self.total_items = 0
         self.binding = []
+        self.sort_key = 'volume'
+        self.engine = 'pivot'
+        # arguments , manifest and own bins of the last pack , utilisation of the last plan , see update
+        self.options = None
+        self.manifest = []
+        self.base_bins = []
+        self.utilisation = 0
+        # put items into maximal free spaces , see pack(free_space)
+        self.free_space = False
+        # time.monotonic() after which pack stops searching , see pack(time_budget)
+        self.deadline = None
+        # True if the last pack ran out of time
+        self.truncated = False
         # self.apex = []
 
 
@@ -372,8 +822,34 @@ class Packer:
         return self.items.append(item)
 
 
-    def pack2Bin(self, bin, item,fix_point,check_stable,support_surface_ratio):
-        ''' pack item to bin '''
+    def pack2Bin(self, bin, item,fix_point,check_stable,support_surface_ratio,extreme_points=False,memoize='exact'):
+        ''' pack item to bin 
+        extreme_points : try the extreme point set of bin instead of every item corner
+        memoize : name in MEMO_MODES , 'exact' skips items identical to one which already failed on the same bin state
+        '''
+        if isinstance(item, ItemGroup):
+            fitted = self.packGroup(bin, item, fix_point, check_stable, support_surface_ratio, extreme_points, memoize)
+        else:
+            fitted = self.placeItem(bin, item, fix_point, check_stable, support_surface_ratio, extreme_points, memoize)
+        if not fitted:
+            bin.unfitted_items.append(item)
+
+
+    def packGroup(self, bin, group, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' place blocks of the group until every carton is in or none fits , True if all are in '''
+        while group.unpacked > 0:
+            for block in group.blocks(bin):
+                block.position = START_POSITION
+                if self.placeItem(bin, block, fix_point, check_stable, support_surface_ratio, extreme_points, memoize):
+                    group.unpacked -= block.counts[0] * block.counts[1] * block.counts[2]
+                    break
+            else:
+                return False
+        return True
+
+
+    def placeItem(self, bin, item, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' put item on the first pivot of bin which takes it , True if placed '''
         fitted = False
         bin.fix_point = fix_point
         bin.check_stable = check_stable
@@ -386,31 +862,76 @@ class Packer:
                 bin.putCorner(i,corner_lst[i])
 
         elif not bin.items:
-            response = bin.putItem(item, item.position)
+            return bin.putItem(item, item.position)
+
+        context = (fix_point, check_stable, support_surface_ratio, extreme_points, self.free_space, bin.rotation_order)
+        if memoize and bin.isKnownUnfit(item, context):
+            return False
+
+        if self.free_space:
+            # out of time : the items left stay unfit
+            if self.isOverdue():
+                return False
+            fitted = bin.putFree(item, self.isOverdue)
+            if not fitted and memoize and not self.truncated:
+                bin.rememberUnfit(item, context)
+            return fitted
+
+        if self.isOverdue():
+            # out of time : only the lowest extreme point is tried
+            for pivot in bin.extreme_points:
+                fitted = bin.putItem(item, list(pivot))
+                break
+            return fitted
+
+        pivots = bin.extreme_points if extreme_points else self.itemPivots(bin)
+        for pivot in pivots:
+            if bin.putItem(item, list(pivot)):
+                fitted = True
+                break
+            if self.isOverdue():
+                break
+        if not fitted and memoize and not self.truncated:
+            bin.rememberUnfit(item, context)
+        return fitted
+
+
+    def isOverdue(self):
+        ''' True once the deadline of pack passed , marks the plan as truncated '''
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.truncated = True
+        return self.truncated
+
+
+    @property
+    def stats(self):
+        ''' search counters summed over bins '''
+        total = Counter()
+        for bin in self.bins:
+            total.update(bin.stats)
+        lookups = total['memo_hits'] + total['memo_misses']
+        total['memo_hit_rate'] = total['memo_hits'] / lookups if lookups else 0
+        return total
 
-            if not response:
-                bin.unfitted_items.append(item)
-            return
 
+    def getUtilisation(self):
+        ''' packed volume over the volume of the bins holding items '''
+        used = [bin for bin in self.bins if bin.items]
+        volume = sum(float(bin.getVolume()) for bin in used)
+        return sum(bin.getUtilisation() * float(bin.getVolume()) for bin in used) / volume if volume else 0
+
+
+    def itemPivots(self, bin):
+        ''' corner of every item in bin along width , then height , then depth '''
         for axis in range(0, 3):
-            items_in_bin = bin.items
-            for ib in items_in_bin:
-                pivot = [0, 0, 0]
+            for ib in bin.items:
                 w, h, d = ib.getDimension()
                 if axis == Axis.WIDTH:
-                    pivot = [ib.position[0] + w,ib.position[1],ib.position[2]]
+                    yield [ib.position[0] + w,ib.position[1],ib.position[2]]
                 elif axis == Axis.HEIGHT:
-                    pivot = [ib.position[0],ib.position[1] + h,ib.position[2]]
+                    yield [ib.position[0],ib.position[1] + h,ib.position[2]]
                 elif axis == Axis.DEPTH:
-                    pivot = [ib.position[0],ib.position[1],ib.position[2] + d]
-                    
-                if bin.putItem(item, pivot, axis):
-                    fitted = True
-                    break
-            if fitted:
-                break
-        if not fitted:
-            bin.unfitted_items.append(item)
+                    yield [ib.position[0],ib.position[1],ib.position[2] + d]
 
 
     def sortBinding(self,bin):
@@ -443,174 +964,390 @@ class Packer:
         return
 
 
+    def sortItems(self, bigger_first, sort_key='volume'):
+        ''' sorted by sort_key (volumn by default , None keeps the order items were added) -> sorted by loadbear -> sorted by level '''
+        if sort_key is not None:
+            key = SORT_KEYS[sort_key] if isinstance(sort_key, str) else sort_key
+            self.items.sort(key=key, reverse=bigger_first)
+        self.items.sort(key=lambda item: item.loadbear, reverse=True)
+        self.items.sort(key=lambda item: item.level, reverse=False)
+
+
+    def fillBin(self, bin, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' put the items left into bin with the engine of pack '''
+        for _ in self.iterFill(bin, fix_point, check_stable, support_surface_ratio, extreme_points, memoize):
+            pass
+
+
+    def iterFill(self, bin, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' fillBin , yielding 'place' events as items are committed , in user units , and 'reject' events '''
+        if self.engine == 'layer':
+            steps = LayerBuilder(bin, check_stable, support_surface_ratio, self.isOverdue).iterPack(self.items, bin.unfitted_items)
+        else:
+            steps = (self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio, extreme_points, memoize) for item in self.items)
+        placed, rejected = len(bin.items), len(bin.unfitted_items)
+        for _ in steps:
+            for placement in bin.items[placed:]:
+                if bin.numeric == 'int':
+                    placement = placement.toDecimal(bin.number_of_decimals)
+                yield PackEvent('place', bin, placement)
+            for item in bin.unfitted_items[rejected:]:
+                yield PackEvent('reject', bin, item)
+            placed, rejected = len(bin.items), len(bin.unfitted_items)
+
+
+    def packBin(self, bin, bigger_first, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' pack every item left into one bin '''
+        for _ in self.iterBin(bin, bigger_first, fix_point, check_stable, support_surface_ratio, extreme_points, memoize):
+            pass
+
+
+    def iterBin(self, bin, bigger_first, fix_point, check_stable, support_surface_ratio, extreme_points=False, memoize='exact'):
+        ''' packBin , yielding the events of iterFill , with binding only those of the repacking '''
+        if self.binding == []:
+            yield from self.iterFill(bin, fix_point, check_stable, support_surface_ratio, extreme_points, memoize)
+        else:
+            self.fillBin(bin, fix_point, check_stable, support_surface_ratio, extreme_points, memoize)
+            # resorted
+            self.sortItems(bigger_first, self.sort_key)
+            # clear bin
+            for placement in bin.items:
+                if isinstance(placement, BlockPlacement):
+                    placement.item.unpacked += placement.count
+            bin.clearBin()
+            bin.unfitted_items = self.unfit_items
+            # repacking
+            yield from self.iterFill(bin, fix_point, check_stable, support_surface_ratio, extreme_points, memoize)
+
+
     def putOrder(self):
         '''Arrange the order of items '''
-        r = []
         for i in self.bins:
-            # open top container
-            if i.put_type == 2:
-                i.items.sort(key=lambda item: item.position[0], reverse=False)
-                i.items.sort(key=lambda item: item.position[1], reverse=False)
-                i.items.sort(key=lambda item: item.position[2], reverse=False)
-            # general container
-            elif i.put_type == 1:
-                i.items.sort(key=lambda item: item.position[1], reverse=False)
-                i.items.sort(key=lambda item: item.position[2], reverse=False)
-                i.items.sort(key=lambda item: item.position[0], reverse=False)
-            else :
-                pass
+            self.orderBin(i)
         return
 
 
-    def gravityCenter(self,bin):
+    def orderBin(self, i):
+        ''' Arrange the order of the items of one bin '''
+        # open top container
+        if i.put_type == 2:
+            i.orderItems(lambda item: (item.position[2], item.position[1], item.position[0]))
+        # general container
+        elif i.put_type == 1:
+            i.orderItems(lambda item: (item.position[0], item.position[2], item.position[1]))
+        else :
+            pass
+
+
+    def gravityCenter(self, bin, zones=(2, 2)):
         ''' 
         Deviation Of Cargo gravity distribution
+        zones : (N,M) equal zones of the bin floor , N along width and M along height ,
+        percentages of the weight over each zone , listed by height row then width ,
+        the weight of an item is shared by the area of its footprint over each zone.
         ''' 
-        w = int(bin.width)
-        h = int(bin.height)
-        d = int(bin.depth)
-
-        area1 = [set(range(0,w//2+1)),set(range(0,h//2+1)),0]
-        area2 = [set(range(w//2+1,w+1)),set(range(0,h//2+1)),0]
-        area3 = [set(range(0,w//2+1)),set(range(h//2+1,h+1)),0]
-        area4 = [set(range(w//2+1,w+1)),set(range(h//2+1,h+1)),0]
-        area = [area1,area2,area3,area4]
-
-        for i in bin.items:
-
-            x_st = int(i.position[0])
-            y_st = int(i.position[1])
-            if i.rotation_type == 0:
-                x_ed = int(i.position[0] + i.width)
-                y_ed = int(i.position[1] + i.height)
-            elif i.rotation_type == 1:
-                x_ed = int(i.position[0] + i.height)
-                y_ed = int(i.position[1] + i.width)
-            elif i.rotation_type == 2:
-                x_ed = int(i.position[0] + i.height)
-                y_ed = int(i.position[1] + i.depth)
-            elif i.rotation_type == 3:
-                x_ed = int(i.position[0] + i.depth)
-                y_ed = int(i.position[1] + i.height)
-            elif i.rotation_type == 4:
-                x_ed = int(i.position[0] + i.depth)
-                y_ed = int(i.position[1] + i.width)
-            elif i.rotation_type == 5:
-                x_ed = int(i.position[0] + i.width)
-                y_ed = int(i.position[1] + i.depth)
-
-            x_set = set(range(x_st,int(x_ed)+1))
-            y_set = set(range(y_st,y_ed+1))
-
-            # cal gravity distribution
-            for j in range(len(area)):
-                if x_set.issubset(area[j][0]) and y_set.issubset(area[j][1]) : 
-                    area[j][2] += int(i.weight)
-                    break
-                # include x and !include y
-                elif x_set.issubset(area[j][0]) == True and y_set.issubset(area[j][1]) == False and len(y_set & area[j][1]) != 0 : 
-                    y = len(y_set & area[j][1]) / (y_ed - y_st) * int(i.weight)
-                    area[j][2] += y
-                    if j >= 2 :
-                        area[j-2][2] += (int(i.weight) - x)
-                    else :
-                        area[j+2][2] += (int(i.weight) - y)
-                    break
-                # include y and !include x
-                elif x_set.issubset(area[j][0]) == False and y_set.issubset(area[j][1]) == True and len(x_set & area[j][0]) != 0 : 
-                    x = len(x_set & area[j][0]) / (x_ed - x_st) * int(i.weight)
-                    area[j][2] += x
-                    if j >= 2 :
-                        area[j-2][2] += (int(i.weight) - x)
-                    else :
-                        area[j+2][2] += (int(i.weight) - x)
-                    break
-                # !include x and !include y
-                elif x_set.issubset(area[j][0])== False and y_set.issubset(area[j][1]) == False and len(y_set & area[j][1]) != 0  and len(x_set & area[j][0]) != 0 :
-                    all = (y_ed - y_st) * (x_ed - x_st)
-                    y = len(y_set & area[0][1])
-                    y_2 = y_ed - y_st - y
-                    x = len(x_set & area[0][0])
-                    x_2 = x_ed - x_st - x
-                    area[0][2] += x * y / all * int(i.weight)
-                    area[1][2] += x_2 * y / all * int(i.weight)
-                    area[2][2] += x * y_2 / all * int(i.weight)
-                    area[3][2] += x_2 * y_2 / all * int(i.weight)
-                    break
-            
-        r = [area[0][2],area[1][2],area[2][2],area[3][2]]
-        result = []
-        for i in r :
-            result.append(round(i / sum(r) * 100,2))
-        return result
-
-
-    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS):
-        '''pack master func '''
+        [n, m] = zones
+        if not bin.items:
+            return [0] * (n * m)
+        if (n, m) == (2, 2):
+            # the quadrant loads of the running totals , listed in the same order
+            load = np.array(bin.load.quadrants)
+        else:
+            boxes = np.array([
+                [float(i.position[0]), float(i.position[0] + dx), float(i.position[1]), float(i.position[1] + dy)]
+                for i, [dx, dy, _] in ((i, i.getDimension()) for i in bin.items)
+            ])
+            weights = np.array([float(i.weight) for i in bin.items])
+
+            # overlap of every footprint with every zone edge interval
+            xs = np.linspace(0, float(bin.width), n + 1)
+            ys = np.linspace(0, float(bin.height), m + 1)
+            ox = np.clip(np.minimum(boxes[:,1,None], xs[None,1:]) - np.maximum(boxes[:,0,None], xs[None,:-1]), 0, None)
+            oy = np.clip(np.minimum(boxes[:,3,None], ys[None,1:]) - np.maximum(boxes[:,2,None], ys[None,:-1]), 0, None)
+            area = (boxes[:,1] - boxes[:,0]) * (boxes[:,3] - boxes[:,2])
+            share = np.divide(weights, area, out=np.zeros_like(weights), where=area > 0)
+            load = np.einsum('k,ki,kj->ji', share, ox, oy)
+
+        total = load.sum()
+        # empty or weightless bin
+        result = load / total * 100 if total > 0 else np.zeros_like(load)
+        return [round(float(i), 2) for i in result.ravel()]
+
+
+    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS,numeric=DEFAULT_NUMERIC,bin_factory=None,extreme_points=False,memoize='exact',sort_key='volume',rotation_order=None,time_budget=None,engine='pivot',free_space=False,gravity_zones=(2, 2)):
+        '''pack master func 
+        numeric : 'decimal' or 'int', 'int' packs on an integer grid of 10^-number_of_decimals units
+        and converts the results back to Decimal user units.
+        bin_factory : called as bin_factory(count) when every bin is packed and items are left,
+        returns the next Bin to open or None to stop. Needs distribute_items.
+        extreme_points : search the maintained extreme point set of each bin , ordered by its ep_order ,
+        instead of the corners of every item in it.
+        memoize : name in MEMO_MODES , reject items identical to one known not to fit the current state of a bin ,
+        see Packer.stats for the hit rate.
+        sort_key : name in SORT_KEYS or a function of an item , first ordering of the items before loadbear and level ,
+        None keeps the order items were added in.
+        rotation_order : rotation types tried first to last by putItem , None for RotationType order.
+        time_budget : seconds , once spent the pivot search stops , the remaining items only try the lowest
+        extreme point of each bin or stay unfit , no new bin is opened and truncated is set.
+        engine : name in ENGINES , 'layer' builds horizontal layers of shelves , fix_point , extreme_points
+        and memoize only apply to 'pivot'.
+        free_space : 'pivot' puts each item straight into the lowest , then tightest , maximal free space of the bin
+        holding it , instead of trying pivots.
+        gravity_zones : (N,M) zones of bin.gravity , see gravityCenter.
+        see iterPack for the placements as they are made.
+        '''
+        options = {k: v for k, v in locals().items() if k != 'self'}
+        for _ in self.iterPack(**options):
+            pass
+
+
+    def iterPack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS,numeric=DEFAULT_NUMERIC,bin_factory=None,extreme_points=False,memoize='exact',sort_key='volume',rotation_order=None,time_budget=None,engine='pivot',free_space=False,gravity_zones=(2, 2)):
+        '''
+        pack , yielding a PackEvent as a bin is opened , an item is committed , an item is left out of a bin
+        and a bin is closed , see PACK_EVENTS. a closed bin is in user units , its gravity is set.
+        stopping the iteration , by close() or leaving a for loop , keeps the bins packed so far ,
+        the items left become unfit and truncated is set.
+        '''
+        options = {k: v for k, v in locals().items() if k != 'self'}
+        if numeric not in NUMERIC_BACKENDS:
+            raise ValueError('numeric must be one of {}'.format(NUMERIC_BACKENDS))
+        if engine not in ENGINES:
+            raise ValueError('engine must be one of {}'.format(ENGINES))
+        if memoize not in MEMO_MODES:
+            raise ValueError('memoize must be one of {}'.format(MEMO_MODES))
+        self.options = options
+        self.base_bins = list(self.bins)
+        self.engine = engine
+        self.free_space = free_space
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.truncated = False
         # set decimals
         for bin in self.bins:
-            bin.formatNumbers(number_of_decimals)
+            bin.formatNumbers(number_of_decimals, numeric)
 
+        all_items = list(self.items)
+        self.manifest = all_items
         for item in self.items:
-            item.formatNumbers(number_of_decimals)
+            item.formatNumbers(number_of_decimals, numeric)
+            if isinstance(item, ItemGroup):
+                item.unpacked = item.quantity
+        for bin in self.bins:
+            bin.rotation_order = rotation_order
         # add binding attribute
         self.binding = binding
+        self.sort_key = sort_key
         # Bin : sorted by volumn
         self.bins.sort(key=lambda bin: bin.getVolume(), reverse=bigger_first)
         # Item : sorted by volumn -> sorted by loadbear -> sorted by level -> binding
-        self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
-        # self.items.sort(key=lambda item: item.getMaxArea(), reverse=bigger_first)
-        self.items.sort(key=lambda item: item.loadbear, reverse=True)
-        self.items.sort(key=lambda item: item.level, reverse=False)
+        self.sortItems(bigger_first, sort_key)
         # sorted by binding
         if binding != []:
             self.sortBinding(bin)
 
-        for idx,bin in enumerate(self.bins):
-            # pack item to bin
-            for item in self.items:
-                self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio)
-
-            if binding != []:
-                # resorted
-                self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
-                self.items.sort(key=lambda item: item.loadbear, reverse=True)
-                self.items.sort(key=lambda item: item.level, reverse=False)
-                # clear bin
-                bin.items = []
-                bin.unfitted_items = self.unfit_items
-                bin.fit_items = np.array([[0,bin.width,0,bin.height,0,0]])
-                # repacking
-                for item in self.items:
-                    self.pack2Bin(bin, item,fix_point,check_stable,support_surface_ratio)
-            
-            # Deviation Of Cargo Gravity Center 
-            self.bins[idx].gravity = self.gravityCenter(bin)
+        idx = 0
+        bin = None
+        try:
+            while idx < len(self.bins) or (bin_factory is not None and distribute_items and self.items != []):
+                opened = idx == len(self.bins)
+                if opened and self.isOverdue():
+                    break
+                if opened:
+                    # open a new bin for the items left over
+                    bin = bin_factory(idx + 1)
+                    if bin is None:
+                        break
+                    bin.formatNumbers(number_of_decimals, numeric)
+                    bin.rotation_order = rotation_order
+                    self.bins.append(bin)
+
+                bin = self.bins[idx]
+                if not distribute_items:
+                    # every bin gets the whole manifest
+                    for item in self.items:
+                        if isinstance(item, ItemGroup):
+                            item.unpacked = item.quantity
+                # the events of a new bin wait for its first placement , a bin nothing fits is dropped unseen
+                held = [PackEvent('open', bin)]
+                for event in self.iterBin(bin, bigger_first, fix_point, check_stable, support_surface_ratio, extreme_points, memoize):
+                    held.append(event)
+                    if not opened or event.kind == 'place':
+                        yield from held
+                        held = []
+                        opened = False
+
+                if opened and not bin.items:
+                    # the remaining items do not fit an empty bin
+                    self.bins.pop()
+                    bin = None
+                    break
+                yield from held
+                self.closeBin(bin, distribute_items, gravity_zones)
+                closed, bin = bin, None
+                yield PackEvent('close', closed)
+                idx += 1
+        except GeneratorExit:
+            # stopped by the caller
+            self.truncated = True
+            if bin is not None and bin.items:
+                self.closeBin(bin, distribute_items, gravity_zones)
+            self.finishPack(all_items)
+            raise
+        self.finishPack(all_items)
+
+
+    def closeBin(self, bin, distribute_items, gravity_zones):
+        ''' gravity and order of a packed bin , drop its items from the ones left , then bin back to user units '''
+        # Deviation Of Cargo Gravity Center 
+        bin.gravity = self.gravityCenter(bin, gravity_zones)
+
+        if distribute_items :
+            for bitem in bin.items:
+                # groups leave once every carton is in
+                if isinstance(bitem, BlockPlacement):
+                    continue
+                no = bitem.partno
+                for item in self.items :
+                    if item.partno == no :
+                        self.items.remove(item)
+                        break
+            self.items = [item for item in self.items if not (isinstance(item, ItemGroup) and item.unpacked == 0)]
+
+        # put order of items
+        self.orderBin(bin)
+        numeric = bin.numeric
+        bin.restoreNumbers()
+        # restoreNumbers also restores the items in bin , the ones still to pack go back to the grid
+        for item in self.items:
+            if item.numeric != numeric:
+                item.formatNumbers(item.number_of_decimals, numeric)
 
-            if distribute_items :
-                for bitem in bin.items:
-                    no = bitem.partno
-                    for item in self.items :
-                        if item.partno == no :
-                            self.items.remove(item)
-                            break
 
+    def finishPack(self, all_items):
+        ''' unfit items , order and user units once the packing stops '''
         # put order of items
         self.putOrder()
 
         if self.items != []:
-            self.unfit_items = copy.deepcopy(self.items)
+            self.unfit_items = list(self.items)
             self.items = []
+
+        # back to user units
+        for bin in self.bins:
+            bin.restoreNumbers()
+        for item in all_items + self.unfit_items:
+            item.restoreNumbers()
+        self.utilisation = self.getUtilisation()
         # for item in self.items.copy():
         #     if item in bin.unfitted_items:
         #         self.items.remove(item)
 
 
+    def update(self, add=[], remove=[], repack_below=REPACK_BELOW):
+        '''
+        warm start , change the manifest of the last pack without packing every item again.
+        remove : partnos , their boxes leave the bins with the boxes resting on them , which are put back.
+        add : items put , with the lifted boxes and the unfit items , into the room left in the bins ,
+        by the pivot search of pack2Bin whatever the engine , then into new bins of bin_factory.
+        repack_below : fraction of the utilisation of the last plan , by pack or update , below it the manifest
+        is packed again.
+        returns True if the plan was changed in place , False if it was packed again.
+        '''
+        if self.options is None:
+            raise ValueError('update needs a plan , call pack first')
+        options = self.options
+        remove = set(remove)
+        self.manifest = [item for item in self.manifest if item.partno not in remove] + list(add)
+        if not options['distribute_items'] or options['binding'] != []:
+            self.repack()
+            return False
+
+        # the plan is in Decimal user units , the delta is packed in them
+        delta = []
+        for bin in self.bins:
+            bin.unfitted_items = []
+            for placement in bin.removeItems([p for p in bin.items if p.partno in remove]):
+                if placement.partno in remove:
+                    continue
+                if isinstance(placement, BlockPlacement):
+                    placement.item.unpacked += placement.count
+                if not any(placement.item is item for item in delta):
+                    delta.append(placement.item)
+        for item in self.unfit_items:
+            if item.partno not in remove and not any(item is other for other in delta):
+                delta.append(item)
+        for item in add:
+            item.formatNumbers(options['number_of_decimals'], 'decimal')
+            if isinstance(item, ItemGroup):
+                item.unpacked = item.quantity
+        delta += list(add)
+        for item in delta:
+            item.position = START_POSITION
+
+        self.deadline = None
+        self.truncated = False
+        self.items = delta
+        self.sortItems(options['bigger_first'], options['sort_key'])
+        args = (options['fix_point'], options['check_stable'], options['support_surface_ratio'], options['extreme_points'], options['memoize'])
+        bin_factory = options['bin_factory']
+        idx = 0
+        while self.items and (idx < len(self.bins) or bin_factory is not None):
+            opened = idx == len(self.bins)
+            if opened:
+                bin = bin_factory(idx + 1)
+                if bin is None:
+                    break
+                bin.formatNumbers(options['number_of_decimals'], 'decimal')
+                bin.rotation_order = options['rotation_order']
+                self.bins.append(bin)
+            bin = self.bins[idx]
+            for item in self.items:
+                self.pack2Bin(bin, item, *args)
+            if opened and not bin.items:
+                self.bins.pop()
+                break
+            self.items = list(bin.unfitted_items)
+            idx += 1
+
+        for bin in self.bins:
+            bin.gravity = self.gravityCenter(bin, options['gravity_zones'])
+        self.putOrder()
+        self.unfit_items = self.items
+        self.items = []
+        if self.getUtilisation() < repack_below * self.utilisation:
+            self.repack()
+            return False
+        self.utilisation = self.getUtilisation()
+        return True
+
+
+    def repack(self):
+        ''' pack the manifest of the last plan again into its own bins , emptied , with the same arguments '''
+        for bin in self.base_bins:
+            bin.clearBin()
+            bin.unfitted_items = []
+            bin.gravity = []
+        for item in self.manifest:
+            item.position = START_POSITION
+        self.bins = list(self.base_bins)
+        self.items = list(self.manifest)
+        self.unfit_items = []
+        self.pack(**self.options)
+
+
+
+# corners of the unit cube and the four corners of each of its faces
+CUBE_CORNERS = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]], dtype=float)
+CUBE_FACES = np.array([[0,1,2,3],[4,5,6,7],[0,1,5,4],[3,2,6,7],[0,3,7,4],[1,2,6,5]])
+# sides of the polygon drawn for a cylinder
+CYLINDER_SIDES = 16
+
+
 
 class Painter:
 
     def __init__(self,bins):
         ''' '''
+        self.bin = bins
         self.items = bins.items
         self.width = bins.width
         self.height = bins.height
@@ -675,17 +1412,73 @@ class Painter:
         if text != "" :
             ax.text( (x+ dx/2), (y+ dy/2), (z+ dz/2), str(text),color='black', fontsize=fontsize, ha='center', va='center')
 
-    def plotBoxAndItems(self,title="",alpha=0.2,write_num=False,fontsize=10):
-        """ side effective. Plot the Bin and the items it contains. """
+    def _plotBatched(self, ax, cartons, alpha=0.2, write_num=False, fontsize=10, max_labels=None):
+        """ every face of every carton as rows of one vertex array , drawn by a Poly3DCollection per face size """
+        boxes = np.array([
+            [float(v) for v in list(item.position) + item.getDimension()] for item in cartons
+        ]).reshape(-1, 6)
+        colors = to_rgba_array([item.color for item in cartons], alpha) if cartons else np.zeros((0, 4))
+        cube = np.array([item.typeof != 'cylinder' for item in cartons], dtype=bool)
+
+        # cubes : 6 quads each
+        corners = boxes[cube,None,:3] + CUBE_CORNERS[None] * boxes[cube,None,3:]
+        quads = [corners[:, CUBE_FACES].reshape(-1, 4, 3)]
+        quad_colors = [np.repeat(colors[cube], len(CUBE_FACES), axis=0)]
+
+        # cylinders : a prism of CYLINDER_SIDES side quads and two caps
+        theta = np.linspace(0, 2 * np.pi, CYLINDER_SIDES + 1)
+        cyl = boxes[~cube]
+        rings = np.stack([
+            (cyl[:,0,None] + cyl[:,3,None] / 2 * (1 + np.cos(theta))),
+            (cyl[:,1,None] + cyl[:,4,None] / 2 * (1 + np.sin(theta))),
+            np.repeat(cyl[:,2,None], len(theta), axis=1),
+        ], axis=-1)
+        tops = rings + np.array([0, 0, 1.0]) * cyl[:,None,5,None]
+        sides = np.stack([rings[:,:-1], rings[:,1:], tops[:,1:], tops[:,:-1]], axis=2)
+        quads.append(sides.reshape(-1, 4, 3))
+        quad_colors.append(np.repeat(colors[~cube], CYLINDER_SIDES, axis=0))
+        caps = np.concatenate([rings[:,:-1], tops[:,:-1]])
+
+        ax.add_collection3d(art3d.Poly3DCollection(
+            np.concatenate(quads), facecolors=np.concatenate(quad_colors), edgecolors='black', linewidths=0.3))
+        if len(caps):
+            ax.add_collection3d(art3d.Poly3DCollection(
+                caps, facecolors=np.concatenate([colors[~cube]] * 2), edgecolors='none'))
+
+        if write_num:
+            # label the largest cartons only , at most max_labels
+            order = np.argsort(-np.prod(boxes[:,3:], axis=1), kind='stable')[:max_labels]
+            for i in order:
+                [x, y, z, w, h, d] = boxes[i]
+                # above the collections , which mplot3d orders by depth after the other artists
+                ax.text(x + w/2, y + h/2, z + d/2, str(cartons[i].partno), color='black', fontsize=fontsize, ha='center', va='center', fontproperties=myfont, zorder=100)
+
+
+    def plotBoxAndItems(self,title="",alpha=0.2,write_num=False,fontsize=10,batched=False,max_labels=None):
+        """ side effective. Plot the Bin and the items it contains. 
+        batched : draw every item face with one Poly3DCollection instead of patches per face ,
+        max_labels : with batched and write_num , label only the largest max_labels items.
+        """
         fig = plt.figure()
         axGlob = plt.axes(projection='3d')
-        
+        self.drawBin(axGlob, title, alpha, write_num, fontsize, batched, max_labels)
+        return plt
+
+
+    def drawBin(self, axGlob, title="", alpha=0.2, write_num=False, fontsize=10, batched=False, max_labels=None):
+        """ Plot the Bin and the items it contains on a 3d axes , no pyplot state is used. """
         # plot bin 
         self._plotCube(axGlob,0, 0, 0, float(self.width), float(self.height), float(self.depth),color='black',mode=1,linewidth=2,text="")
 
+        if batched:
+            self._plotBatched(axGlob, list(self.bin.iterCartons()), alpha, write_num, fontsize, max_labels)
+            axGlob.set_title(title, fontproperties=myfont)
+            self.setAxesEqual(axGlob)
+            return
+
         counter = 0
-        # fit rotation type
-        for item in self.items:
+        # fit rotation type , blocks of an ItemGroup are drawn carton by carton
+        for item in self.bin.iterCartons():
             rt = item.rotation_type  
             x,y,z = item.position
             [w,h,d] = item.getDimension()
@@ -702,9 +1495,8 @@ class Painter:
             counter = counter + 1  
 
         
-        plt.title(title, fontproperties=myfont)
+        axGlob.set_title(title, fontproperties=myfont)
         self.setAxesEqual(axGlob)
-        return plt
 
 
     def setAxesEqual(self,ax):
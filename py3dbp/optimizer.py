@@ -0,0 +1,173 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from .constants import RotationType
+from .main import Packer, SORT_KEYS
+from .fleet import BinTemplate, freshItems
+from .auxiliary_methods import poolContext
+
+# rotation preferences searched together with the item order
+ROTATION_ORDERS = [
+    None,
+    [RotationType.RT_HWD, RotationType.RT_WHD] + RotationType.ALL[2:],
+    list(reversed(RotationType.ALL)),
+]
+
+# share of time_budget the greedy start may use , the rest goes to the search
+SEED_SHARE = 0.2
+
+# state of a worker process , set once by initWorker
+_worker = {}
+
+
+class OptimizeResult:
+    ''' best plan found by optimizeSequence '''
+
+    def __init__(self, packer, score, order, rotation_order, evaluations, history):
+        ''' '''
+        self.packer = packer
+        self.score = score
+        # item indices in packing order
+        self.order = order
+        self.rotation_order = rotation_order
+        self.evaluations = evaluations
+        # [(seconds, score)] of every improvement of the best plan
+        self.history = history
+
+
+
+def sequenceScore(packer):
+    ''' fewer unfit items , then fewer bins , then fuller bins (sum of squared utilisation) '''
+    used = [bin for bin in packer.bins if bin.items]
+    return (len(packer.unfit_items), len(used), -sum(bin.getUtilisation() ** 2 for bin in used))
+
+
+def energy(score):
+    ''' score as one number for the annealing acceptance , the squared utilisation sum never exceeds the bin count '''
+    unfit, bins, fill = score
+    return unfit * 1e6 + bins * 1e3 + fill
+
+
+def evaluateSequence(bin_factory, items, order, rotation_order, pack_kwargs):
+    ''' pack items in order , opening bins from bin_factory as needed '''
+    packer = Packer()
+    for idx in order:
+        packer.addItem(items[idx])
+    options = dict(pack_kwargs)
+    options.update(sort_key=None, rotation_order=rotation_order, bin_factory=bin_factory)
+    packer.pack(**options)
+    return packer
+
+
+def initWorker(bin_factory, items, pack_kwargs):
+    ''' '''
+    _worker['bin_factory'] = bin_factory
+    _worker['items'] = items
+    _worker['pack_kwargs'] = pack_kwargs
+
+
+def evaluateInWorker(order, rotation_order, time_budget):
+    ''' score and plan of one candidate , packed within time_budget seconds '''
+    pack_kwargs = dict(_worker['pack_kwargs'], time_budget=time_budget)
+    packer = evaluateSequence(_worker['bin_factory'], freshItems(_worker['items']), order, rotation_order, pack_kwargs)
+    return sequenceScore(packer), packer
+
+
+def neighbour(order, rotation, groups, rng):
+    ''' swap , move or reverse items of one loadbear and level group , or change the rotation preference '''
+    order = list(order)
+    if rng.random() < 0.1:
+        return order, rng.randrange(len(ROTATION_ORDERS))
+    group = rng.choice(groups)
+    if len(group) < 2:
+        return order, rotation
+    # positions of the group in order
+    slots = [pos for pos, idx in enumerate(order) if idx in group]
+    i, j = sorted(rng.sample(range(len(slots)), 2))
+    move = rng.random()
+    members = [order[pos] for pos in slots]
+    if move < 0.5:
+        members[i], members[j] = members[j], members[i]
+    elif move < 0.8:
+        members.insert(j, members.pop(i))
+    else:
+        members[i:j+1] = reversed(members[i:j+1])
+    for pos, idx in zip(slots, members):
+        order[pos] = idx
+    return order, rotation
+
+
+def optimizeSequence(bin, items, time_budget=30, workers=None, seed=0, sort_key='volume', bigger_first=True, temperature=0.05, **pack_kwargs):
+    '''
+    simulated annealing over the item order and the rotation preference under a wall-clock budget ,
+    each round evaluates one neighbour per worker process.
+    bin : template of the bins opened as needed , items : the manifest.
+    Packer.pack still sorts by loadbear and level , so only orders inside those groups are searched.
+    the best plan so far is always a valid plan , starting from the greedy order of sort_key packed within
+    SEED_SHARE of time_budget , it is kept as packed , every evaluation is bounded by the time left so the
+    search returns at the deadline with the best of the candidates finished by then.
+    '''
+    start = time.monotonic()
+    deadline = start + time_budget
+    rng = random.Random(seed)
+    bin_factory = BinTemplate(bin)
+    items = freshItems(items)
+    workers = workers or os.cpu_count() or 1
+
+    # greedy start : the order Packer.pack would use
+    key = SORT_KEYS[sort_key] if isinstance(sort_key, str) else sort_key
+    order = sorted(range(len(items)), key=lambda idx: key(items[idx]), reverse=bigger_first)
+    order.sort(key=lambda idx: items[idx].loadbear, reverse=True)
+    order.sort(key=lambda idx: items[idx].level)
+
+    groups = {}
+    for idx in order:
+        groups.setdefault((items[idx].level, items[idx].loadbear), set()).add(idx)
+    groups = list(groups.values())
+
+    current = (order, 0)
+    seed_kwargs = dict(pack_kwargs, time_budget=time_budget * SEED_SHARE)
+    best_packer = evaluateSequence(bin_factory, freshItems(items), order, None, seed_kwargs)
+    current_score = sequenceScore(best_packer)
+    best, best_score = current, current_score
+    evaluations = 1
+    history = [(time.monotonic() - start, best_score)]
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=poolContext(), initializer=initWorker, initargs=(bin_factory, items, pack_kwargs)
+    )
+    futures = []
+    try:
+        while time.monotonic() < deadline:
+            candidates = [neighbour(current[0], current[1], groups, rng) for _ in range(workers)]
+            left = max(deadline - time.monotonic(), 0)
+            futures = [executor.submit(evaluateInWorker, order, ROTATION_ORDERS[rotation], left) for order, rotation in candidates]
+            done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            evaluations += len(done)
+            t = temperature * max(deadline - time.monotonic(), 0) / time_budget
+            for candidate, future in zip(candidates, futures):
+                if future not in done:
+                    continue
+                score, packer = future.result()
+                if packer.truncated:
+                    # cut short by the deadline , not a result of the order
+                    continue
+                delta = energy(score) - energy(current_score)
+                if delta <= 0 or (t > 0 and rng.random() < math.exp(-delta / t)):
+                    current, current_score = candidate, score
+                if score < best_score:
+                    best, best_score, best_packer = candidate, score, packer
+                    history.append((time.monotonic() - start, best_score))
+            if len(done) < len(futures):
+                # the deadline passed , the candidates which finished are already kept
+                break
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    order, rotation = best
+    return OptimizeResult(best_packer, best_score, order, ROTATION_ORDERS[rotation], evaluations, history)
@@ -0,0 +1,215 @@
+import numpy as np
+from .auxiliary_methods import int2Decimal
+from .constants import RotationType
+
+
+class PlacementStore:
+    ''' growable struct-of-arrays store of committed boxes, one row per column '''
+
+    # bounds rows
+    X0, X1, Y0, Y1, Z0, Z1 = range(6)
+
+    def __init__(self, capacity=64):
+        ''' '''
+        self.bounds = np.zeros((6, capacity))
+        self.item = np.full(capacity, -1, dtype=np.int64)
+        self.rotation = np.zeros(capacity, dtype=np.int8)
+        self.size = 0
+
+
+    def __len__(self):
+        ''' '''
+        return self.size
+
+
+    def _grow(self):
+        ''' double the capacity '''
+        capacity = 2 * self.bounds.shape[1]
+        bounds = np.zeros((6, capacity))
+        bounds[:, :self.size] = self.bounds[:, :self.size]
+        item = np.full(capacity, -1, dtype=np.int64)
+        item[:self.size] = self.item[:self.size]
+        rotation = np.zeros(capacity, dtype=np.int8)
+        rotation[:self.size] = self.rotation[:self.size]
+        self.bounds, self.item, self.rotation = bounds, item, rotation
+
+
+    def append(self, box, item=-1, rotation=0):
+        ''' box : [x0,x1,y0,y1,z0,z1], item : index in bin.items or -1 '''
+        if self.size == self.bounds.shape[1]:
+            self._grow()
+        self.bounds[:, self.size] = [float(v) for v in box]
+        self.item[self.size] = item
+        self.rotation[self.size] = rotation
+        self.size += 1
+
+
+    def reset(self):
+        ''' forget every row, the buffers are kept '''
+        self.size = 0
+
+
+    @property
+    def boxes(self):
+        ''' (n,6) view of [x0,x1,y0,y1,z0,z1] rows, no copy '''
+        return self.bounds[:, :self.size].T
+
+
+    def column(self, k):
+        ''' contiguous view of one bounds column '''
+        return self.bounds[k, :self.size]
+
+
+    @property
+    def items(self):
+        ''' '''
+        return self.item[:self.size]
+
+
+    @property
+    def rotations(self):
+        ''' '''
+        return self.rotation[:self.size]
+
+
+
+class Placement:
+    ''' immutable record of one item committed to a bin '''
+
+    __slots__ = ('item', 'position', 'rotation_type', 'dimension')
+
+    def __init__(self, item, position, rotation_type, dimension):
+        ''' position : [x,y,z], dimension : [w,h,d] after rotation '''
+        object.__setattr__(self, 'item', item)
+        object.__setattr__(self, 'position', tuple(position))
+        object.__setattr__(self, 'rotation_type', rotation_type)
+        object.__setattr__(self, 'dimension', tuple(dimension))
+
+
+    def __setattr__(self, name, value):
+        ''' '''
+        raise AttributeError('Placement is immutable')
+
+
+    def __reduce__(self):
+        ''' '''
+        return (Placement, (self.item, self.position, self.rotation_type, self.dimension))
+
+
+    @classmethod
+    def of(cls, item):
+        ''' record item at its current position and rotation '''
+        return cls(item, item.position, item.rotation_type, item.getDimension())
+
+
+    # attributes of the placed item
+    partno = property(lambda self: self.item.partno)
+    name = property(lambda self: self.item.name)
+    typeof = property(lambda self: self.item.typeof)
+    color = property(lambda self: self.item.color)
+    weight = property(lambda self: self.item.weight)
+    level = property(lambda self: self.item.level)
+    loadbear = property(lambda self: self.item.loadbear)
+    updown = property(lambda self: self.item.updown)
+    width = property(lambda self: self.item.width)
+    height = property(lambda self: self.item.height)
+    depth = property(lambda self: self.item.depth)
+
+
+    def getDimension(self):
+        ''' [w,h,d] after rotation '''
+        return list(self.dimension)
+
+
+    def getVolume(self):
+        ''' '''
+        return self.item.getVolume()
+
+
+    def toDecimal(self, number_of_decimals):
+        ''' record with integer grid position and dimension in Decimal user units '''
+        return Placement(
+            self.item,
+            [int2Decimal(i, number_of_decimals) for i in self.position],
+            self.rotation_type,
+            [int2Decimal(i, number_of_decimals) for i in self.dimension])
+
+
+    def string(self):
+        ''' '''
+        return "%s pos(%s) rt(%s) dim(%s)" % (
+            self.partno, list(self.position), self.rotation_type, list(self.dimension)
+        )
+
+
+
+class BlockPlacement(Placement):
+    ''' n*m*k cartons of an ItemGroup committed as one box , counts and carton are along the bin axes '''
+
+    __slots__ = ('counts', 'carton')
+
+    def __init__(self, item, position, rotation_type, dimension, counts, carton):
+        ''' '''
+        Placement.__init__(self, item, position, rotation_type, dimension)
+        object.__setattr__(self, 'counts', tuple(counts))
+        object.__setattr__(self, 'carton', tuple(carton))
+
+
+    def __reduce__(self):
+        ''' '''
+        return (BlockPlacement, (self.item, self.position, self.rotation_type, self.dimension, self.counts, self.carton))
+
+
+    @property
+    def count(self):
+        ''' '''
+        return self.counts[0] * self.counts[1] * self.counts[2]
+
+
+    @property
+    def weight(self):
+        ''' '''
+        return self.item.weight * self.count
+
+
+    def getVolume(self):
+        ''' '''
+        return self.item.getVolume() * self.count
+
+
+    def cartonRotation(self):
+        ''' rotation type of the cartons inside the block '''
+        whd = [self.item.width, self.item.height, self.item.depth]
+        for rt in RotationType.ALL:
+            if [whd[i] for i in RotationType.AXES[rt]] == list(self.carton):
+                return rt
+        return self.rotation_type
+
+
+    def expand(self):
+        ''' per-carton placements , generated on demand '''
+        rt = self.cartonRotation()
+        [x,y,z] = self.position
+        [w,h,d] = self.carton
+        for i in range(self.counts[0]):
+            for j in range(self.counts[1]):
+                for k in range(self.counts[2]):
+                    yield Placement(self.item, [x + i*w, y + j*h, z + k*d], rt, self.carton)
+
+
+    def toDecimal(self, number_of_decimals):
+        ''' '''
+        return BlockPlacement(
+            self.item,
+            [int2Decimal(i, number_of_decimals) for i in self.position],
+            self.rotation_type,
+            [int2Decimal(i, number_of_decimals) for i in self.dimension],
+            self.counts,
+            [int2Decimal(i, number_of_decimals) for i in self.carton])
+
+
+    def string(self):
+        ''' '''
+        return "%s pos(%s) rt(%s) dim(%s) block(%s)" % (
+            self.partno, list(self.position), self.rotation_type, list(self.dimension), 'x'.join(str(i) for i in self.counts)
+        )
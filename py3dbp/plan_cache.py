@@ -0,0 +1,109 @@
+import hashlib
+from collections import OrderedDict
+from decimal import Decimal
+
+from .main import Packer
+
+
+def canonical(value):
+    ''' text of value which equal inputs share , 1 and 1.0 included '''
+    if isinstance(value, bool) or value is None:
+        return repr(value)
+    if isinstance(value, (int, float, Decimal)):
+        return str(Decimal(str(value)).normalize())
+    if isinstance(value, str):
+        return repr(value)
+    if isinstance(value, dict):
+        return '{' + ','.join('{}:{}'.format(canonical(k), canonical(value[k])) for k in sorted(value)) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(canonical(v) for v in value) + ']'
+    if hasattr(value, 'bin'):
+        # BinTemplate
+        return 'template' + canonicalBin(value.bin)
+    if callable(value) and getattr(value, '__closure__', None) is None and '<' not in value.__qualname__:
+        return '{}.{}'.format(value.__module__, value.__qualname__)
+    raise ValueError('{!r} has no canonical form , use a BinTemplate or a module level function'.format(value))
+
+
+def canonicalItem(item):
+    ''' what packing reads of an item '''
+    return canonical([
+        type(item).__name__, item.partno, item.name, item.typeof, [item.width, item.height, item.depth],
+        item.weight, item.level, item.loadbear, item.updown, item.color, getattr(item, 'quantity', 1)
+    ])
+
+
+def canonicalBin(bin):
+    ''' what packing reads of an empty bin '''
+    return canonical([
+        bin.partno, [bin.width, bin.height, bin.depth], bin.max_weight, bin.corner, bin.put_type,
+        bin.spatial_index if isinstance(bin.spatial_index, str) else type(bin.spatial_index).__name__,
+        list(bin.extreme_points.order), bin.heightmap_cell, bin.cg_envelope,
+    ])
+
+
+def planKey(items, bins, pack_kwargs):
+    ''' sha256 of the manifest in order , the bins and the options of Packer.pack '''
+    text = '|'.join([
+        ';'.join(canonicalItem(item) for item in items),
+        ';'.join(canonicalBin(bin) for bin in bins),
+        canonical(pack_kwargs),
+    ])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    ''' packed Packers by planKey , least recently used first out. cached packers are shared , do not change them '''
+
+    def __init__(self, size=32):
+        ''' '''
+        self.size = size
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __contains__(self, key):
+        ''' '''
+        return key in self.plans
+
+
+    def get(self, key):
+        ''' packer stored under key , None if not cached '''
+        packer = self.plans.get(key)
+        if packer is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.plans.move_to_end(key)
+        return packer
+
+
+    def put(self, key, packer):
+        '''
+        store packer under key , a plan changed by Packer.update may be stored under the key of its manifest.
+        a plan cut short by time_budget is not stored , the next identical request packs again.
+        '''
+        if packer.truncated:
+            self.plans.pop(key, None)
+            return
+        self.plans[key] = packer
+        self.plans.move_to_end(key)
+        while len(self.plans) > self.size:
+            self.plans.popitem(last=False)
+
+
+    def pack(self, items, bins, **pack_kwargs):
+        ''' Packer of items packed into bins with pack_kwargs , from the cache when the same inputs were packed '''
+        key = planKey(items, bins, pack_kwargs)
+        packer = self.get(key)
+        if packer is not None:
+            return packer
+        packer = Packer()
+        for bin in bins:
+            packer.addBin(bin)
+        for item in items:
+            packer.addItem(item)
+        packer.pack(**pack_kwargs)
+        self.put(key, packer)
+        return packer
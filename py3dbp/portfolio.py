@@ -0,0 +1,114 @@
+import copy
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from .constants import RotationType
+from .main import Packer, SORT_KEYS
+from .fleet import freshItems
+from .auxiliary_methods import poolContext
+
+# pack options tried by packPortfolio , tie_break orders the items before the stable sorts of Packer.pack :
+# 'input' keeps the manifest order , 'random' shuffles with the run seed , or a name in SORT_KEYS
+DEFAULT_CONFIGS = [
+    {'sort_key': 'volume', 'bigger_first': True},
+    {'sort_key': 'max_area', 'bigger_first': True},
+    {'sort_key': 'longest_side', 'bigger_first': True},
+    {'sort_key': 'depth', 'bigger_first': True},
+    {'sort_key': 'weight', 'bigger_first': True},
+    {'sort_key': 'volume', 'bigger_first': True, 'tie_break': 'max_area'},
+    {'sort_key': 'volume', 'bigger_first': True, 'tie_break': 'random'},
+    {'sort_key': 'max_area', 'bigger_first': True, 'tie_break': 'random'},
+    {'sort_key': 'volume', 'bigger_first': True, 'rotation_order': [RotationType.RT_HWD, RotationType.RT_WHD] + RotationType.ALL[2:]},
+    {'sort_key': 'max_area', 'bigger_first': True, 'rotation_order': list(reversed(RotationType.ALL))},
+    {'sort_key': 'volume', 'bigger_first': True, 'extreme_points': True},
+]
+
+
+class PortfolioResult:
+    ''' best plan of packPortfolio and the outcome of every configuration '''
+
+    def __init__(self, packer, config, score, outcomes):
+        ''' '''
+        self.packer = packer
+        self.config = config
+        self.score = score
+        # [(config, score or 'timeout' or the exception)] , 'timeout' for a run cut short by its time_budget
+        self.outcomes = outcomes
+
+
+
+def planScore(packer):
+    ''' fewer unfit items , then fewer bins used , then higher utilisation of the used bins '''
+    used = [bin for bin in packer.bins if bin.items]
+    volume = sum(float(bin.getVolume()) for bin in used)
+    packed = sum(bin.getUtilisation() * float(bin.getVolume()) for bin in used)
+    return (len(packer.unfit_items), len(used), -(packed / volume if volume else 0))
+
+
+def runConfig(bins, items, config, seed, pack_kwargs):
+    ''' pack copies of bins and items with one configuration '''
+    config = dict(config)
+    tie_break = config.pop('tie_break', 'input')
+    items = freshItems(items)
+    if tie_break == 'random':
+        random.Random(seed).shuffle(items)
+    elif tie_break != 'input':
+        items.sort(key=SORT_KEYS[tie_break])
+
+    packer = Packer()
+    for bin in bins:
+        packer.addBin(copy.deepcopy(bin))
+    for item in items:
+        packer.addItem(item)
+    options = dict(pack_kwargs)
+    options.update(config)
+    packer.pack(**options)
+    return packer
+
+
+def packPortfolio(bins, items, configs=None, workers=None, timeout=None, seed=0, **pack_kwargs):
+    '''
+    pack empty bins and items with every configuration in parallel processes and keep the best plan by planScore.
+    configs : list of Packer.pack options plus tie_break , DEFAULT_CONFIGS by default.
+    timeout : seconds per run , passed as the time_budget of each pack , a run cut short by it is reported
+    as 'timeout' and only chosen when no run finished.
+    seed : seeds the random tie breaks , the result only depends on it and the inputs , unless a timeout
+    cuts runs short since which runs finish in time depends on the machine.
+    pack_kwargs : options shared by every run , e.g. number_of_decimals , numeric or a picklable bin_factory.
+    '''
+    configs = DEFAULT_CONFIGS if configs is None else configs
+    workers = workers or os.cpu_count() or 1
+    outcomes = [None] * len(configs)
+    packers = [None] * len(configs)
+    scores = [None] * len(configs)
+    if timeout is not None:
+        pack_kwargs.setdefault('time_budget', timeout)
+
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(configs)) or 1, mp_context=poolContext())
+    futures = []
+    try:
+        futures = [
+            executor.submit(runConfig, bins, items, config, seed + idx, pack_kwargs)
+            for idx, config in enumerate(configs)
+        ]
+        # every run stops by itself at its time_budget
+        wait(futures)
+        for idx, future in enumerate(futures):
+            if future.exception() is not None:
+                outcomes[idx] = (configs[idx], future.exception())
+                continue
+            packers[idx] = future.result()
+            scores[idx] = planScore(packers[idx])
+            outcomes[idx] = (configs[idx], 'timeout' if packers[idx].truncated else scores[idx])
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+    # finished runs first , ties go to the earlier configuration
+    ran = [idx for idx, packer in enumerate(packers) if packer is not None]
+    if not ran:
+        return PortfolioResult(None, None, None, outcomes)
+    best = min(ran, key=lambda idx: (packers[idx].truncated, scores[idx], idx))
+    return PortfolioResult(packers[best], configs[best], scores[best], outcomes)
@@ -0,0 +1,130 @@
+import hashlib
+import io
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.figure import Figure
+
+from .main import Painter
+from .auxiliary_methods import poolContext
+
+# image formats renderScene writes
+RENDER_FORMATS = ['png', 'svg']
+
+
+class SceneCarton:
+    ''' what Painter reads of one placed carton '''
+
+    __slots__ = ('partno', 'typeof', 'color', 'position', 'dimension', 'rotation_type')
+
+    def __init__(self, partno, typeof, color, position, dimension, rotation_type):
+        ''' '''
+        self.partno = partno
+        self.typeof = typeof
+        self.color = color
+        self.position = position
+        self.dimension = dimension
+        self.rotation_type = rotation_type
+
+
+    def getDimension(self):
+        ''' '''
+        return list(self.dimension)
+
+
+
+class Scene:
+    ''' picklable snapshot of a bin and its cartons in float units , what a plot depends on '''
+
+    def __init__(self, bin):
+        ''' '''
+        self.partno = bin.partno
+        self.width = float(bin.width)
+        self.height = float(bin.height)
+        self.depth = float(bin.depth)
+        self.cartons = tuple(
+            (str(c.partno), c.typeof, c.color, tuple(float(v) for v in c.position),
+             tuple(float(v) for v in c.getDimension()), c.rotation_type)
+            for c in bin.iterCartons()
+        )
+
+
+    @property
+    def items(self):
+        ''' '''
+        return list(self.iterCartons())
+
+
+    def iterCartons(self):
+        ''' '''
+        for carton in self.cartons:
+            yield SceneCarton(*carton)
+
+
+    def key(self, fmt, view):
+        ''' hash of the bin size , the placements , the format and the view parameters '''
+        text = repr(((self.width, self.height, self.depth), self.cartons, fmt, sorted(view.items())))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+
+def renderScene(scene, fmt='png', view={}):
+    ''' image bytes of a scene , drawn on its own Figure so no pyplot state is shared '''
+    fig = Figure()
+    ax = fig.add_subplot(projection='3d')
+    Painter(scene).drawBin(ax, **view)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+
+class Renderer:
+    '''
+    renders bins to PNG or SVG bytes in a process pool ,
+    images are kept in an LRU cache keyed by Scene.key , so an unchanged bin is not drawn again.
+    '''
+
+    def __init__(self, workers=None, cache_size=64):
+        ''' workers : processes , None for os.cpu_count() '''
+        self.workers = workers
+        self.cache_size = cache_size
+        # key : Future of the image bytes , in use order
+        self.cache = OrderedDict()
+        self.executor = None
+        self.hits = 0
+        self.misses = 0
+
+
+    def submit(self, bin, fmt='png', **view):
+        ''' Future of the image of bin , view : keyword arguments of Painter.drawBin '''
+        if fmt not in RENDER_FORMATS:
+            raise ValueError('fmt must be one of {}'.format(RENDER_FORMATS))
+        scene = Scene(bin)
+        key = scene.key(fmt, view)
+        future = self.cache.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return future
+        self.misses += 1
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=poolContext())
+        future = self.executor.submit(renderScene, scene, fmt, view)
+        self.cache[key] = future
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return future
+
+
+    def render(self, bins, fmt='png', **view):
+        ''' image bytes of every bin , drawn in parallel '''
+        futures = [self.submit(bin, fmt, **view) for bin in bins]
+        return [future.result() for future in futures]
+
+
+    def close(self):
+        ''' '''
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,90 @@
+import math
+from collections import defaultdict
+
+# number of grid cells along the longest side of the bin
+GRID_DIVISIONS = 12
+
+
+class LinearIndex:
+    ''' spatial index which returns every committed box, i.e. the plain linear scan '''
+
+    def __init__(self):
+        ''' '''
+        self.keys = []
+
+
+    def clear(self):
+        ''' '''
+        self.keys = []
+
+
+    def insert(self, key, box):
+        ''' box : [x0,x1,y0,y1,z0,z1] '''
+        self.keys.append(key)
+
+
+    def query(self, box):
+        ''' keys of boxes that may overlap box '''
+        return self.keys
+
+
+
+class GridIndex:
+    ''' uniform 3D grid, every box is registered in all the cells it touches '''
+
+    def __init__(self, cell_size=None):
+        ''' '''
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+
+    def clear(self):
+        ''' '''
+        self.cells = defaultdict(list)
+
+
+    def _cellRange(self, box):
+        ''' cell coordinates covered by box on each axis '''
+        c = self.cell_size
+        return [
+            range(math.floor(float(box[2*a]) / c), math.floor(float(box[2*a+1]) / c) + 1)
+            for a in range(3)
+        ]
+
+
+    def insert(self, key, box):
+        ''' box : [x0,x1,y0,y1,z0,z1] '''
+        rx, ry, rz = self._cellRange(box)
+        for i in rx:
+            for j in ry:
+                for k in rz:
+                    self.cells[(i, j, k)].append(key)
+
+
+    def query(self, box):
+        ''' keys of boxes that may overlap box, in insertion order '''
+        rx, ry, rz = self._cellRange(box)
+        found = set()
+        for i in rx:
+            for j in ry:
+                for k in rz:
+                    cell = self.cells.get((i, j, k))
+                    if cell:
+                        found.update(cell)
+        return sorted(found)
+
+
+
+def makeIndex(spatial_index, WHD):
+    ''' build the spatial index of a bin, spatial_index : 'grid', 'linear' or an index object '''
+    if spatial_index == 'grid':
+        longest = max(float(v) for v in WHD)
+        return GridIndex(cell_size=max(longest / GRID_DIVISIONS, 1e-9))
+    elif spatial_index == 'linear':
+        return LinearIndex()
+    else:
+        spatial_index.clear()
+        if getattr(spatial_index, 'cell_size', 0) is None:
+            longest = max(float(v) for v in WHD)
+            spatial_index.cell_size = max(longest / GRID_DIVISIONS, 1e-9)
+        return spatial_index
@@ -0,0 +1,39 @@
+import io
+import json
+
+from py3dbp.batch import packJobs, readJobs
+
+CSV_JOBS = '''job,bin,bin_width,bin_height,bin_depth,bin_max_weight,partno,width,height,depth,weight,level,loadbear,updown,quantity
+a,B,10,10,10,100,p1,5,5,5,1,1,1,1,2
+b,B,10,10,10,100,p2,5,5,5,1,x,1,1,1
+b,B,10,10,10,100,p3,5,5
+c,B,10,10,10,100,p4,5,5,5,1,1,1,1,1
+'''
+
+
+def jsonJob(id, partno='p'):
+    ''' '''
+    return json.dumps({
+        'id': id,
+        'bin': {'partno': 'B', 'WHD': [10, 10, 10], 'max_weight': 100},
+        'items': [{'partno': partno, 'WHD': [5, 5, 5], 'weight': 1, 'quantity': 3}],
+    })
+
+
+def test_bad_csv_row_fails_only_its_job():
+    ''' a non integer level and a short row fail job b , jobs a and c still pack '''
+    results = list(packJobs(readJobs(io.StringIO(CSV_JOBS), 'csv'), workers=0))
+    assert [(r['id'], r['ok']) for r in results] == [('a', True), ('b', False), ('c', True)]
+    assert 'ValueError' in results[1]['error']
+    assert len(results[0]['bins'][0]['items']) == 2
+    assert results[2]['unfit'] == []
+
+
+def test_bad_jsonl_record_fails_only_its_job():
+    ''' a broken line and an item without WHD fail their own jobs in the process pool '''
+    bad_item = json.dumps({'id': 'y', 'items': [{'partno': 'p', 'weight': 1}]})
+    lines = [jsonJob('w'), '{not json', bad_item, jsonJob('z')]
+    results = list(packJobs(readJobs(lines), workers=2))
+    assert [r['index'] for r in results] == [0, 1, 2, 3]
+    assert [r['ok'] for r in results] == [True, False, False, True]
+    assert results[3]['id'] == 'z' and results[3]['unfit'] == []
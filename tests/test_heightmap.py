@@ -0,0 +1,43 @@
+import random
+
+from py3dbp.main import Bin, Item
+
+
+def cube(w, h, d, position):
+    ''' '''
+    item = Item('box', 'box', 'cube', (w, h, d), 1, 1, 1, False, 'olive')
+    item.position = position
+    return item
+
+
+def test_post_is_not_support():
+    ''' a 10x10 carton on a 2x2 post inside one 10 cell is unstable , and nothing lies under (5,5) '''
+    for cell in [None, 10]:
+        bin = Bin('B', (100, 100, 100), 1000, heightmap_cell=cell)
+        bin.support_surface_ratio = 0.75
+        bin.commit(cube(2, 2, 10, [0, 0, 0]))
+        assert not bin.isStable(0, 0, 10, 10, 10)
+        assert bin.dropHeight(5, 5, 50) == 0
+
+
+def test_heightmap_answers_as_the_scan():
+    ''' support , drop height and support height agree with the scan of the boxes on unaligned boxes '''
+    r = random.Random(0)
+    for cell in [1, 5, 7, 10]:
+        bins = [Bin('B', (100, 100, 100), 10**6, heightmap_cell=cell), Bin('B', (100, 100, 100), 10**6)]
+        for bin in bins:
+            bin.support_surface_ratio = 0.6
+        for _ in range(100):
+            w, h, d = r.choice([3, 5, 7, 10, 20]), r.choice([4, 5, 10, 20]), r.randint(1, 20)
+            x, y = r.randint(0, 100 - w), 5 * r.randint(0, (100 - h) // 5)
+            z = bins[1].supportHeight(x, x + w, y, y + h, 100)
+            if z + d <= 100:
+                for bin in bins:
+                    bin.commit(cube(w, h, d, [x, y, z]))
+        for _ in range(500):
+            w, h = r.choice([3, 5, 7, 10, 15]), r.choice([4, 5, 10, 13])
+            x, y = r.randint(0, 100 - w), r.randint(0, 100 - h)
+            z = bins[1].supportHeight(x, x + w, y, y + h, 100)
+            assert bins[0].supportHeight(x, x + w, y, y + h, 100) == z
+            assert bins[0].isStable(x, y, z, w, h) == bins[1].isStable(x, y, z, w, h)
+            assert bins[0].dropHeight(x + 0.5, y, 60) == bins[1].dropHeight(x + 0.5, y, 60)
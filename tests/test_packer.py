@@ -0,0 +1,145 @@
+import random
+
+from py3dbp.main import Packer, Bin, Item
+
+
+def cartons(n, seed=0):
+    ''' n cartons of a few repeated shapes , so identical items meet the same bin state '''
+    r = random.Random(seed)
+    shapes = [((r.randint(20, 60), r.randint(20, 60), r.randint(15, 50)), r.randint(1, 30), r.choice([True, False])) for _ in range(6)]
+    items = []
+    for i in range(n):
+        WHD, weight, updown = r.choice(shapes)
+        items.append(Item('c-{}'.format(i), 'c-{}'.format(i), 'cube', WHD, weight, 1, 1, updown, 'olive'))
+    return items
+
+
+def plan(packer):
+    ''' placements of a packed packer , comparable across packs '''
+    return (
+        [(bin.partno, item.partno, [float(v) for v in item.position], item.rotation_type) for bin in packer.bins for item in bin.items],
+        sorted(item.partno for item in packer.unfit_items),
+    )
+
+
+def packed(items, **options):
+    ''' packer of items in two pallets '''
+    packer = Packer()
+    for i in range(2):
+        packer.addBin(Bin('P{}'.format(i), (120, 100, 120), 1500))
+    for item in items:
+        packer.addItem(item)
+    packer.pack(bigger_first=True, **options)
+    return packer
+
+
+def test_memo_keeps_the_placements():
+    ''' skipping items identical to a known failure places every item as the full search does '''
+    for seed in range(3):
+        memo = packed(cartons(120, seed), memoize='exact')
+        assert memo.stats['memo_hits'] > 0
+        assert plan(memo) == plan(packed(cartons(120, seed), memoize=None))
+
+
+def box(partno, w, h, d, position):
+    ''' '''
+    item = Item(partno, partno, 'cube', (w, h, d), 1, 1, 1, False, 'olive')
+    item.position = position
+    return item
+
+
+def boxes(packer):
+    ''' (partno , x0 , x1 , y0 , y1 , z0 , z1) of every carton placed by packer '''
+    placed = []
+    for bin in packer.bins:
+        for item in bin.items:
+            [x, y, z] = [float(v) for v in item.position]
+            [w, h, d] = [float(v) for v in item.getDimension()]
+            placed.append((bin.partno, item.partno, x, x + w, y, y + h, z, z + d))
+    return placed
+
+
+def assertSound(packer):
+    ''' every carton placed once , no two cartons of a bin overlap and each one off the floor rests on another '''
+    partnos = [b[1] for b in boxes(packer)] + [item.partno for item in packer.unfit_items]
+    assert len(partnos) == len(set(partnos))
+    placed = boxes(packer)
+    for a in placed:
+        others = [b for b in placed if b[0] == a[0] and b is not a]
+        assert not any(
+            a[2] < b[3] and b[2] < a[3] and a[4] < b[5] and b[4] < a[5] and a[6] < b[7] and b[6] < a[7] for b in others
+        )
+        if a[6] > 0:
+            assert any(abs(b[7] - a[6]) < 1e-6 and a[2] < b[3] and b[2] < a[3] and a[4] < b[5] and b[4] < a[5] for b in others)
+
+
+def test_remove_lifts_the_stack():
+    ''' a box leaves with the boxes resting on it , directly or through others , the box beside it stays '''
+    bin = Bin('B', (100, 100, 100), 1000)
+    bottom, middle, top, beside = box('a', 10, 10, 10, [0, 0, 0]), box('b', 10, 10, 10, [0, 0, 10]), \
+        box('c', 5, 5, 5, [5, 5, 20]), box('d', 10, 10, 10, [10, 0, 0])
+    for item in [bottom, middle, top, beside]:
+        bin.commit(item)
+    removed = bin.removeItems([bin.items[0]])
+    assert [p.partno for p in removed] == ['a', 'b', 'c']
+    assert [p.partno for p in bin.items] == ['d']
+    assert bin.getTotalWeight() == 1
+
+
+def test_update_keeps_a_sound_plan():
+    ''' removed cartons leave , lifted and added cartons are put back once , stacks stay supported '''
+    packer = packed(cartons(60), memoize='exact')
+    assertSound(packer)
+    placed = [b[1] for b in boxes(packer)]
+    remove = placed[:3]
+    add = [Item('n-{}'.format(i), 'n-{}'.format(i), 'cube', (30, 30, 30), 5, 1, 1, True, 'olive') for i in range(3)]
+    assert packer.update(add=add, remove=remove, repack_below=0)
+    assertSound(packer)
+    partnos = [b[1] for b in boxes(packer)] + [item.partno for item in packer.unfit_items]
+    assert not set(remove) & set(partnos)
+    assert sorted(partnos) == sorted(item.partno for item in packer.manifest)
+    assert packer.utilisation == packer.getUtilisation()
+
+
+def test_update_repacks_below_the_threshold():
+    ''' a plan falling under repack_below of the last one is packed again from the manifest '''
+    packer = packed(cartons(60), memoize='exact')
+    remove = [b[1] for b in boxes(packer)][:3]
+    assert not packer.update(remove=remove, repack_below=2)
+    assertSound(packer)
+    fresh = packed([item for item in cartons(60) if item.partno not in remove], memoize='exact')
+    assert plan(packer) == plan(fresh)
+
+
+def test_gravity_reads_the_running_totals():
+    ''' the quadrant loads kept by LoadTotals give the zones the footprint scan gives '''
+    packer = packed(cartons(60), memoize='exact')
+    for bin in packer.bins:
+        quadrants = packer.gravityCenter(bin, (2, 2))
+        zones = packer.gravityCenter(bin, (4, 2))
+        for q in range(4):
+            assert abs(quadrants[q] - zones[2*q] - zones[2*q+1]) <= 0.02
+
+
+def metreCartons(n, seed=0):
+    ''' cartons in metres to the centimetre , whose float sums miss the ties of the integer grid '''
+    r = random.Random(seed)
+    return [Item(
+        'm-{}'.format(i), 'm-{}'.format(i), 'cube',
+        (round(r.uniform(0.2, 0.6), 2), round(r.uniform(0.2, 0.6), 2), round(r.uniform(0.15, 0.5), 2)),
+        round(r.uniform(1, 30), 2), 1, r.choice([1, 300]), r.choice([True, False]), 'olive') for i in range(n)]
+
+
+def test_backends_place_alike():
+    ''' the integer grid and Decimal arithmetic place every carton at the same position in every search mode '''
+    for seed in range(3):
+        for options in [{}, {'extreme_points': True}, {'free_space': True}, {'engine': 'layer'}, {'sort_key': 'max_area'}]:
+            plans = []
+            for numeric in ['decimal', 'int']:
+                packer = Packer()
+                packer.addBin(Bin('P', (1.2, 1.0, 1.2), 1500))
+                for item in metreCartons(60, seed):
+                    packer.addItem(item)
+                packer.pack(bigger_first=True, numeric=numeric, number_of_decimals=2, **options)
+                plans.append(plan(packer))
+            assert plans[0] == plans[1]